@@ -25,8 +25,11 @@ __all__=['Area','AreaXY','AreaGEO']
 from PyGMTcommand import *
 from PyGMTcanvas import *
 from PyGMTutil import round_up, round_down
+from PyGMTtable import *
+from PyGMTcache import grid_cache, result_cache, contour_cache, level_files
+from PyGMTproject import get_projection, UNITS, MEASURE_UNITS
 from StringIO import StringIO
-import os, numpy, tempfile
+import os, math, copy, numpy
 
 class Area(object):
     """Base class for GMT areas."""
@@ -45,7 +48,9 @@ class Area(object):
             raise TypeError, 'Expected a Canvas or an Area'
         # and defaults
         self.verbose = parent.verbose
-        self.defaults = Defaults(parent.defaults.GetCurrentSettings())
+        self.binary = parent.binary
+        self.defaults = Defaults(parent.defaults.GetCurrentSettings(),env=self.canvas.env,
+                                 table=parent.defaults.table,parent=parent.defaults)
 
         # position and size
         self.pos = pos
@@ -77,6 +82,13 @@ class Area(object):
 
         # used for clipping
         self.__doplot = True
+
+        # if True, text is collected and plotted by flushtext or when the canvas is closed
+        self.buffer_text = False
+        self.__textbuffer = []
+
+        # if set, lines are reduced to what can be seen at this resolution (dots per inch)
+        self.dpi = None
         
     def setregion(self,ll,ur,rectangular=True):
         """Set region string.
@@ -113,9 +125,9 @@ class Area(object):
             self.canvas.pos[i] = self.pos[i]
             
         # setting up argument string
-        arg = "%s -K -O -X%f -Y%f >> %s"%(arguments, disp[0],disp[1],self.canvas.name)
+        arg = "%s -K -O -X%f -Y%f"%(arguments, disp[0],disp[1])
         # running command
-        command(com, arg, indata=indata, verbose=self.verbose)
+        self.canvas.plotcom(com, arg, indata=indata, verbose=self.verbose, defaults=self.defaults)
 
     def canvascom(self,com, arguments, indata=''):
         """Plot to the GMT canvas.
@@ -157,11 +169,23 @@ class Area(object):
             disp[i] = self.pos[i]-self.canvas.pos[i]
             self.canvas.pos[i] = self.pos[i]
             
-        # setting up argument string
-        arg = "=bf -R%s -J%s %s -K -O -X%f -Y%f >> %s"%(self.regionstring,self.projection,
-                                                    arguments, disp[0],disp[1],
-                                                    self.canvas.name)
-        gridcommand(com,arg,grid,verbose=self.verbose)
+        # setting up argument string, grids are read from the grid cache
+        # which keeps them until the command has run
+        if grid_cache.enabled:
+            gridname = grid_cache.path(grid,pin=True)
+        else:
+            gridname = ''
+        arg = "%s=bf -R%s -J%s %s -K -O -X%f -Y%f"%(gridname,self.regionstring,self.projection,
+                                                arguments, disp[0],disp[1])
+        if grid_cache.enabled:
+            self.canvas.plotcom(com,arg,verbose=self.verbose,pinned=gridname,
+                                defaults=self.defaults)
+        else:
+            # deferred commands run later, they plot the grid as it is now
+            if self.canvas.deferred:
+                grid = copy.deepcopy(grid)
+            self.canvas.plotcom(com,arg,indata=grid.write,verbose=self.verbose,
+                                defaults=self.defaults)
 
     def text(self,coords,text,textargs='12 0 0 LB',comargs=''):
         """Wrapper for pstext.
@@ -172,8 +196,51 @@ class Area(object):
                   defaults: \"12 0 0 LB\", see pstext manpage
         comargs: arguments passed to pstext command"""
 
+        line = '%f %f %s %s\n'%(coords[0],coords[1],textargs,text)
+        if self.buffer_text:
+            self.__buffer(comargs,line)
+            return
         # calling pstext
-        self.canvascom('pstext',comargs,indata='%f %f %s %s\n'%(coords[0],coords[1],textargs,text))
+        self.canvascom('pstext',comargs,indata=line)
+
+    def texts(self,xloc,yloc,text,textargs='12 0 0 LB',comargs=''):
+        """Plot many text strings with a single pstext call.
+
+        xloc: list of x coordinates of text
+        yloc: list of y coordinates of text
+        text: list of text strings (see pstext manpage for special formats)
+        textargs: string or list of strings containing \"size angle fontno justify\"
+                  defaults: \"12 0 0 LB\", see pstext manpage
+        comargs: arguments passed to pstext command"""
+
+        if isinstance(textargs,list):
+            textargs = [str(t) for t in textargs]
+        data = format_table([xloc,yloc,textargs,[str(t) for t in text]])
+        if self.buffer_text:
+            self.__buffer(comargs,data)
+            return
+        self.canvascom('pstext',comargs,indata=data)
+
+    def __buffer(self,comargs,data):
+        """Add text to the text buffer."""
+
+        if len(self.__textbuffer) == 0:
+            self.canvas.register_buffer(self)
+        self.__textbuffer.append((comargs,data))
+
+    def flushtext(self):
+        """Plot buffered text, one pstext call for each set of pstext arguments."""
+
+        groups = []
+        data = {}
+        for (comargs,d) in self.__textbuffer:
+            if comargs not in data:
+                groups.append(comargs)
+                data[comargs] = []
+            data[comargs].append(d)
+        self.__textbuffer = []
+        for comargs in groups:
+            self.canvascom('pstext',comargs,indata=''.join(data[comargs]))
 
     def partext(self,coords,text,textargs='12 0 0 LB 13p  6 c',comargs=''):
         """Wrapper for pstext in paragraph mode
@@ -185,7 +252,23 @@ class Area(object):
         comargs: arguments passed to pstext command"""
 
         # calling pstext
-        self.canvascom('pstext','-M '+comargs,indata='>%f %f %s\n%s\n'%(coords[0],coords[1],textargs,text))
+        self.partexts([coords[0]],[coords[1]],[text],textargs=textargs,comargs=comargs)
+
+    def partexts(self,xloc,yloc,text,textargs='12 0 0 LB 13p  6 c',comargs=''):
+        """Plot many paragraphs with a single pstext call.
+
+        xloc: list of x coordinates of paragraphs
+        yloc: list of y coordinates of paragraphs
+        text: list of text strings (see pstext manpage for special formats)
+        textargs: string or list of strings containing
+                  \"size angle fontno justify linespace parwidth parjust\"
+                  defaults: \"12 0 0 LB 13p 6 c\", see pstext manpage
+        comargs: arguments passed to pstext command"""
+
+        if not isinstance(textargs,list):
+            textargs = [textargs]*len(text)
+        data = ''.join(['>%f %f %s\n%s\n'%(xloc[i],yloc[i],textargs[i],text[i]) for i in range(0,len(text))])
+        self.canvascom('pstext','-M '+comargs,indata=data)
 
 
     def coordsystem(self,grid=False):
@@ -261,39 +344,43 @@ class Area(object):
         basemapstring=basemapstring+self.axis
         self.canvascom('psbasemap','-B%s'%basemapstring)
         
-        # plotting axis labels
+        # plotting axis labels in one go, positions are in cm relative to the area
         linesp = '%f%s'%(1.1*float(self.labelsize[:-1]),self.labelsize[-1])
+        xloc = []
+        yloc = []
+        labels = []
+        textargs = []
         if self.xlabel != '':
-            plotlabel = False
+            p = None
             if 'N' in self.axis:
                 p = 'LB'
-                pp = 0.
-                xbox = AreaXY(self,pos=[0.,self.size[1]+self.xlaboff],size=[self.size[0],5.])
-                plotlabel = True
+                pp = self.size[1]+self.xlaboff
             elif 'S' in self.axis:
                 p = 'LT'
-                pp = 5.
-                xbox = AreaXY(self,pos=[0.,-5.-self.xlaboff],size=[self.size[0],5.])
-                plotlabel = True
-            if plotlabel:
-                textarg = '%s 0 %s %s %s %f c'%(self.labelsize[:-1],self.labelfont,p,linesp,self.size[0])
-                xbox.partext([0.,pp],self.xlabel,textargs=textarg,comargs='-N')
+                pp = -self.xlaboff
+            if p != None:
+                xloc.append(0.)
+                yloc.append(pp)
+                labels.append(self.xlabel)
+                textargs.append('%s 0 %s %s %s %f c'%(self.labelsize[:-1],self.labelfont,p,linesp,self.size[0]))
 
         if self.ylabel != '':
-            plotlabel = False
+            p = None
             if 'E' in self.axis:
-                pp = 0.
+                pp = self.size[0]+self.ylaboff
                 p = 'LT'
-                ybox = AreaXY(self,pos=[self.size[0]+self.ylaboff,0.],size=[5.,self.size[1]])
-                plotlabel = True
             elif 'W' in self.axis:
-                pp = -5.+self.ylaboff
+                pp = -10.+self.ylaboff
                 p = 'LB'
-                ybox = AreaXY(self,pos=[-5.,0.],size=[5.,self.size[1]])
-                plotlabel = True
-            if plotlabel:
-                textarg = '%s 90 %s %s %s %f c'%(self.labelsize[:-1],self.labelfont,p,linesp,self.size[1])
-                ybox.partext([pp,0],self.ylabel,textargs=textarg,comargs='-N')
+            if p != None:
+                xloc.append(pp)
+                yloc.append(0.)
+                labels.append(self.ylabel)
+                textargs.append('%s 90 %s %s %s %f c'%(self.labelsize[:-1],self.labelfont,p,linesp,self.size[1]))
+
+        if len(labels) > 0:
+            labelbox = AreaXY(self,pos=[0.,0.],size=[self.size[0],self.size[1]])
+            labelbox.partexts(xloc,yloc,labels,textargs=textargs,comargs='-N')
 
     def plotsymbol(self,xloc,yloc,size='1',symbol='c',args=''):
         """Plot symbols.
@@ -305,20 +392,26 @@ class Area(object):
         args:   more arguments
         """
 
-        outstring = StringIO()
-        if not isinstance(size,list):
-            outsize = size
-        if not isinstance(symbol,list):
-            outsymbol = symbol
-        for i in range(0,len(xloc)):
+        # symbol codes cannot be passed in a binary table
+        if self.binary and not isinstance(symbol,list):
+            columns = [xloc,yloc]
+            symarg = '-S%s'%symbol
             if isinstance(size,list):
-                outsize = size[i]
-            if isinstance(symbol,list):
-                outsymbol = symbol[i]
-                
-            outstring.write('%f %f %s %s\n'%(xloc[i],yloc[i],outsize,outsymbol))
-            
-        self.canvascom('psxy',args+' -S',indata=outstring.getvalue())
+                try:
+                    columns.append([float(sz) for sz in size])
+                except ValueError:
+                    columns = None
+            else:
+                symarg = '%s%s'%(symarg,size)
+            if columns != None:
+                self.canvascom('psxy','%s %s %s'%(args,symarg,binary_input(len(columns))),
+                               indata=pack_table(columns))
+                return
+
+        columns = [xloc,yloc,size,symbol]
+        if isinstance(size,list):
+            columns[2] = [str(sz) for sz in size]
+        self.canvascom('psxy',args+' -S',indata=format_table(columns))
 
     def point(self,xloc,yloc,xe,ye,args=''):
         """Plot a point with errors.
@@ -328,45 +421,134 @@ class Area(object):
         xe:     list of x errors
         ye:     list of y errors"""
 
-        outstring = StringIO()
-        for i in range(0,len(xloc)):
-            outstring.write('%f %f %f %f\n'%(xloc[i],yloc[i],xe[i],ye[i]))
-        self.canvascom('psxy',args+' -Exy0 ',indata=outstring.getvalue())
+        if self.binary:
+            self.canvascom('psxy','%s -Exy0 %s'%(args,binary_input(4)),
+                           indata=pack_table([xloc,yloc,xe,ye]))
+            return
+
+        self.canvascom('psxy',args+' -Exy0 ',indata=format_table([xloc,yloc,xe,ye]))
         
-    def line(self,args,xloc,yloc):
+    def decimate(self,xloc,yloc,dpi):
+        """Reduce a line to the points needed at a given resolution.
+
+        xloc, yloc: x and y locations of the line
+        dpi: resolution in dots per inch
+
+        returns a tuple of arrays of x and y locations. Only cartesian
+        areas reduce lines, other areas return the locations unchanged."""
+
+        return (xloc,yloc)
+
+    def line(self,args,xloc,yloc,dpi=None):
         """Plot a line.
 
         args: arguments passed to psxy (for colours...)
+        dpi: if set, the line is reduced to the points which can be seen at this
+             resolution (dots per inch), defaults to A.dpi
 
-        The line is defined a list of x and y locations
+        The line is defined a list of x and y locations, it is broken
+        into segments where x or y are not finite.
         """
-        
-        outstring = StringIO()
-        for i in range(0,len(xloc)):
-            if '%f'%xloc[i]!="nan" and '%f'%yloc[i]!="nan":
-                outstring.write('%f %f\n'%(xloc[i],yloc[i]))
 
-        self.canvascom('psxy',args,indata=outstring.getvalue())
+        if dpi == None:
+            dpi = self.dpi
+        if dpi != None:
+            (xloc,yloc) = self.decimate(xloc,yloc,dpi)
 
-    def steps(self,args,xloc,yloc):
+        runs = segments([xloc,yloc])
+        if len(runs) > 1:
+            args = args+' -M'
+        else:
+            runs = None
+
+        if self.binary:
+            self.canvascom('psxy','%s %s'%(args,binary_input(2)),
+                           indata=pack_table([xloc,yloc],dropnan=True,segments=runs))
+            return
+
+        self.canvascom('psxy',args,indata=format_table([xloc,yloc],segments=runs))
+
+    def lines(self,args,xlocs,ylocs,attributes=None):
+        """Plot many lines with a single psxy call.
+
+        args: arguments passed to psxy (for colours...)
+        xlocs: list of lists/arrays of x locations, one per line
+        ylocs: list of lists/arrays of y locations, one per line
+        attributes: list of psxy options for each line, e.g. '-W1/255/0/0', or None
+
+        Lines are broken into segments where x or y are not finite.
+        """
+
+        if len(xlocs) != len(ylocs) or (attributes != None and len(attributes) != len(xlocs)):
+            raise ValueError, 'Expecting same number of lines'
+
+        # segment attributes can only be passed in a text table
+        if self.binary and attributes == None:
+            data = ''.join([pack_table([x,y],segments=segments([x,y])) for (x,y) in zip(xlocs,ylocs)])
+            self.canvascom('psxy','%s -M %s'%(args,binary_input(2)),indata=data)
+            return
+
+        data = []
+        for i in range(0,len(xlocs)):
+            if attributes == None:
+                header = ''
+            else:
+                header = attributes[i]
+            columns = [xlocs[i],ylocs[i]]
+            data.append(format_table(columns,segments=segments(columns),header=header))
+        self.canvascom('psxy','%s -M'%args,indata=''.join(data))
+
+    def symbols(self,xlocs,ylocs,size='1',symbol='c',attributes=None,args=''):
+        """Plot many groups of symbols with a single psxy call.
+
+        xlocs:  list of lists/arrays of x locations, one per group
+        ylocs:  list of lists/arrays of y locations, one per group
+        size:   single value or list giving size of symbols of each group (strings),
+                the size of a group can also be a list of sizes
+        symbol: single symbol code or list giving symbol of each group,
+                the symbol of a group can also be a list of codes
+        attributes: list of psxy options for each group, e.g. '-G255/0/0 -W1', or None
+        args:   more arguments
+        """
+
+        if len(xlocs) != len(ylocs) or (attributes != None and len(attributes) != len(xlocs)):
+            raise ValueError, 'Expecting same number of groups'
+
+        data = []
+        for i in range(0,len(xlocs)):
+            if attributes == None:
+                header = ''
+            else:
+                header = attributes[i]
+            columns = [xlocs[i],ylocs[i],size,symbol]
+            for j in [2,3]:
+                if isinstance(columns[j],list):
+                    columns[j] = columns[j][i]
+                if isinstance(columns[j],list):
+                    columns[j] = [str(c) for c in columns[j]]
+                else:
+                    columns[j] = str(columns[j])
+            # points which are not finite are dropped
+            valid = valid_rows(columns)
+            for j in range(0,4):
+                if not isinstance(columns[j],basestring):
+                    columns[j] = numpy.asarray(columns[j])[valid]
+            data.append(format_table(columns,segments=[(0,len(columns[0]))],header=header))
+        self.canvascom('psxy','%s -M -S'%args,indata=''.join(data))
+
+    def steps(self,args,xloc,yloc,dpi=None):
         """Plot steps.
 
         args: arguments passed to psxy (for colours...)
+        dpi: resolution used to reduce the line, see line
 
         The line is defined a list of x and y locations
         """
 
-        x = []
-        y = []
-        for i in range(0,len(xloc)-1):
-            x.append(xloc[i])
-            y.append(yloc[i])
-            x.append(xloc[i+1])
-            y.append(yloc[i])
-        x.append(xloc[i+1])
-        y.append(yloc[i+1])
-
-        self.line(args,x,y)
+        x = numpy.repeat(numpy.asarray(xloc,dtype=float),2)[1:]
+        y = numpy.repeat(numpy.asarray(yloc,dtype=float),2)[:-1]
+
+        self.line(args,x,y,dpi=dpi)
         
     def image(self,grid,colourmap,args=''):
         """Create a colour image of a 2D grid.
@@ -394,55 +576,46 @@ class Area(object):
         
 
         # checking if cntr levels are given, i.e. cntr is a list
-        # if so create a tempory file
+        # if so use a file containing the levels
         if isinstance(contours,list):
-            cntrfile = tempfile.NamedTemporaryFile(suffix='.cntr')
-            cntr  = cntrfile.name
-            for c in contours:
-                cntrfile.write("%f\t%s\n"%(float(c),cntrtype))
-            cntrfile.flush()
-        if isinstance(contours,str):
+            cntr = level_files.path(contours,cntrtype)
+        else:
             cntr = contours
-            
-        self.gridcom('grdcontour',grid,'-C%s %s'%(cntr,args))
 
-        # clean up
-        if isinstance(contours,list):
-            cntrfile.close()
+        self.gridcom('grdcontour',grid,'-C%s %s'%(cntr,args))
 
     def clip(self,grid,contour):
-        """Create a clip path from contouring grid."""
-
-        c = float(contour)
-
-        # create a file containing contour level
-        cntrfile = tempfile.NamedTemporaryFile(suffix='.cntr')
-        cntrname  = cntrfile.name
-        cntrfile.write("%f\tc\n"%c)
-        cntrfile.flush()
-
-        # sorting out boundaries
-        grid.data[0,:] = numpy.where(grid.data[0,:]>c,c-0.1,grid.data[0,:]).astype('f')
-        grid.data[-1,:] = numpy.where(grid.data[-1,:]>c,c-0.1,grid.data[-1,:]).astype('f')
-        grid.data[:,0] = numpy.where(grid.data[:,0]>c,c-0.1,grid.data[:,0]).astype('f')
-        grid.data[:,-1] = numpy.where(grid.data[:,-1]>c,c-0.1,grid.data[:,-1]).astype('f')
-        
-        # creating clip path by contouring grid
-        clipfile = tempfile.NamedTemporaryFile(suffix='.clip')
-        clipname = clipfile.name
-        arg = "=bf -R%s -J%s -C%s -M -D%s > /dev/null"%(self.regionstring,self.projection,cntrname,clipname)
-        gridcommand('grdcontour',arg,grid,verbose=self.verbose)
-
-        nl = len(clipfile.readlines())
-
-        if nl>1:
-            # creating clip path
-            self.canvascom('psclip','%s -M'%clipname)
-        else:
+        """Create a clip path from contouring grid.
+
+        grid: GMT grid
+        contour: contour level, the parts of the grid above contour are plotted"""
+
+        # the clip path only depends on the grid and contour level, the
+        # region and projection are passed to psclip
+        fingerprint = grid.fingerprint()
+        key = ('psclip',fingerprint,float(contour),self.binary)
+        data = contour_cache.get(key)
+        if data == None:
+            polygons = contour_cache.contours(grid,contour,fingerprint=fingerprint)
+            if len(polygons) == 0:
+                data = ''
+            else:
+                x = numpy.concatenate([p[0] for p in polygons])
+                y = numpy.concatenate([p[1] for p in polygons])
+                bounds = numpy.cumsum([0]+[len(p[0]) for p in polygons])
+                runs = zip(bounds[:-1],bounds[1:])
+                if self.binary:
+                    data = pack_table([x,y],segments=runs)
+                else:
+                    data = format_table([x,y],segments=runs)
+            contour_cache.put(key,data)
+
+        if len(data) == 0:
             self.__doplot = False
-
-        clipfile.close()
-        cntrfile.close()
+        elif self.binary:
+            self.canvascom('psclip','-M %s'%binary_input(2),indata=data)
+        else:
+            self.canvascom('psclip','-M',indata=data)
 
     def unclip(self):
         """Reset clip path."""
@@ -458,12 +631,25 @@ class Area(object):
         lat:  list of latitudes
         inv:  do inverse transform if true
  
-        return a tuple containing x and y locations
+        return a tuple containing x and y locations, these are arrays
+        if A.binary is set
+
+        Common projections are computed with numpy, see PyGMTproject,
+        others are passed to mapproject.
         """
- 
-        instring = StringIO()
-        for i in range(0,len(long)):
-            instring.write('%f %f\n'%(long[i],lat[i]))
+
+        try:
+            prj = get_projection(self.projection,self.regionstring,self.defaults)
+        except NotImplementedError:
+            prj = None
+        if prj != None:
+            if inv:
+                (x,y) = prj.inverse(long,lat)
+            else:
+                (x,y) = prj.forward(long,lat)
+            if self.binary:
+                return (x,y)
+            return (x.tolist(),y.tolist())
  
         # setting up arguments
         if inv:
@@ -471,7 +657,21 @@ class Area(object):
         else:
             args = ''
         args = args + '-R%s -J%s'%(self.regionstring,self.projection)
-        outstring = command('mapproject',args,indata=instring.getvalue(), verbose=self.verbose)
+
+        if self.binary:
+            args = '%s %s %s'%(args,binary_input(2),binary_output())
+            outdata = result_cache.call(self.canvas.command,'mapproject',args,indata=pack_table([long,lat]),
+                                        context=self.defaults.overrides(),
+                                        verbose=self.verbose,defaults=self.defaults)
+            xy = unpack_table(outdata,2)
+            return (xy[:,0],xy[:,1])
+
+        instring = StringIO()
+        for i in range(0,len(long)):
+            instring.write('%f %f\n'%(long[i],lat[i]))
+        outstring = result_cache.call(self.canvas.command,'mapproject',args,indata=instring.getvalue(),
+                                      context=self.defaults.overrides(),
+                                      verbose=self.verbose,defaults=self.defaults)
 
         xloc = []
         yloc = []
@@ -501,6 +701,7 @@ class AreaXY(Area):
         # initialising data
         Area.__init__(self,parent,pos=pos)
         self.size = size
+        self.logx = logx
 
         # resize region
         self.re_llx = False
@@ -547,6 +748,35 @@ class AreaXY(Area):
             ur[1] = round_up(ur[1])
         Area.setregion(self,ll,ur,rectangular=True)
 
+    def decimate(self,xloc,yloc,dpi):
+        """Reduce a line to the points needed at a given resolution.
+
+        xloc, yloc: x and y locations of the line
+        dpi: resolution in dots per inch
+
+        returns a tuple of arrays of x and y locations, keeping the first,
+        last, lowest and highest point of each run of points falling into
+        the same pixel column."""
+
+        x = numpy.asarray(xloc,dtype=float)
+        y = numpy.asarray(yloc,dtype=float)
+        # pixel columns per unit of x
+        try:
+            unit = MEASURE_UNITS.get(self.defaults.GetCurrentItem('MEASURE_UNIT'),'c')
+        except KeyError:
+            unit = 'c'
+        width = float(self.size[0])*UNITS[unit]*dpi
+        (x0,x1) = (float(self.ll[0]),float(self.ur[0]))
+        if self.logx:
+            with numpy.errstate(divide='ignore',invalid='ignore'):
+                pixels = (numpy.log10(x)-math.log10(x0))*(width/(math.log10(x1)-math.log10(x0)))
+        else:
+            pixels = (x-x0)*(width/(x1-x0))
+        keep = decimate(y,pixels)
+        if keep.all():
+            return (x,y)
+        return (x[keep],y[keep])
+
 class AreaGEO(Area):
     """Geographic plotting area."""
 
@@ -591,38 +821,6 @@ class AreaGEO(Area):
         self.paper.setregion([0.,0.],self.size,rectangular=True)
         self.paper.projection='X%f/%f'%(self.size[0],self.size[1])
 
-    def project(self,long,lat,inv=False):
-        """Project long, lat to projected grid.
-
-        long: list of longitudes
-        lat:  list of latitudes
-        inv:  do inverse transform if true
-
-        return a tuple containing x and y locations
-        """
-
-        instring = StringIO()
-        for i in range(0,len(long)):
-            instring.write('%f %f\n'%(long[i],lat[i]))
-
-        # setting up arguments
-        if inv:
-            args = '-I '
-        else:
-            args = ''
-        args = args + '-R%s -J%s'%(self.regionstring,self.projection)
-        outstring = command('mapproject',args,indata=instring.getvalue(), verbose=self.verbose)
-        
-        xloc = []
-        yloc = []
-        for s in outstring.split('\n'):
-            d = s.split()
-            if len(d) > 1:
-                xloc.append(float(d[0]))
-                yloc.append(float(d[1]))
-
-        return (xloc,yloc)
-
     def coastline(self,args):
         """Plot coastline.
 
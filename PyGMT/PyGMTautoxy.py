@@ -21,6 +21,7 @@
 __all__ = ['AutoXY']
 
 from PyGMTarea import AreaXY
+from PyGMTtable import valid_rows
 import PyGMTutil, numpy, math
 
 class AutoXY(AreaXY):
@@ -46,33 +47,76 @@ class AutoXY(AreaXY):
         self.finalised = False
         self.__plots = []
 
-    def line(self,args,xloc,yloc):
+    def __add(self,p):
+        """Add plot p and extend the bounding box."""
+
+        self.__extend(p.get_bb((self.ll[0],self.ll[1],self.ur[0],self.ur[1])))
+        self.__plots.append(p)
+
+    def __extend(self,bb):
+        if bb == None:
+            return
+        (self.ll[0],self.ll[1],self.ur[0],self.ur[1]) = bb
+
+    def append(self,series,xloc,yloc,*columns):
+        """Append samples to a series.
+
+        series: series returned by line, steps, point or plotsymbol
+        xloc, yloc: x and y locations of the new samples
+        columns: further columns of the series, i.e. x and y errors of points
+
+        Only the new samples are used to extend the bounding box, so
+        data can be added as it becomes available."""
+
+        if self.finalised:
+            raise RuntimeError, 'AutoXY plot is already finalised'
+        bb = series.append(xloc,yloc,*columns)
+        self.__extend(_merge_bb((self.ll[0],self.ll[1],self.ur[0],self.ur[1]),bb))
+
+    def line(self,args,xloc,yloc,dpi=None):
         """Plot a line.
 
         args: arguments passed to psxy (for colours...)
+        dpi: resolution used to reduce the line when the plot is finalised,
+             defaults to A.dpi, see AreaXY.line
 
-        The line is defined a list of x and y locations
+        The line is defined a list of x and y locations. Before the plot is
+        finalised the series is returned, see append.
         """
         if (self.finalised):
-            AreaXY.line(self,args,xloc,yloc)
+            AreaXY.line(self,args,xloc,yloc,dpi=dpi)
         else:
-            p = AutoXY_type_line(args,xloc,yloc)
-            (self.ll[0],self.ll[1],self.ur[0],self.ur[1]) = p.get_bb((self.ll[0],self.ll[1],self.ur[0],self.ur[1]))
-            self.__plots.append(p)
+            p = AutoXY_type_line(args,xloc,yloc,dpi=dpi)
+            self.__add(p)
+            return p
 
-    def steps(self,args,xloc,yloc):
+    def lines(self,args,xlocs,ylocs,attributes=None):
+        """Plot many lines with a single psxy call.
+
+        args: arguments passed to psxy (for colours...)
+        xlocs, ylocs: lists of lists/arrays of x and y locations, one per line
+        attributes: list of psxy options for each line or None
+        """
+        if (self.finalised):
+            AreaXY.lines(self,args,xlocs,ylocs,attributes=attributes)
+        else:
+            p = AutoXY_type_lines(args,xlocs,ylocs,attributes=attributes)
+            self.__add(p)
+
+    def steps(self,args,xloc,yloc,dpi=None):
         """Plot steps.
 
         args: arguments passed to psxy (for colours...)
+        dpi: resolution used to reduce the line, see line
 
         The line is defined a list of x and y locations
         """
         if (self.finalised):
-            AreaXY.steps(self,args,xloc,yloc)
+            AreaXY.steps(self,args,xloc,yloc,dpi=dpi)
         else:
-            p = AutoXY_type_steps(args,xloc,yloc)
-            (self.ll[0],self.ll[1],self.ur[0],self.ur[1]) = p.get_bb((self.ll[0],self.ll[1],self.ur[0],self.ur[1]))
-            self.__plots.append(p)
+            p = AutoXY_type_steps(args,xloc,yloc,dpi=dpi)
+            self.__add(p)
+            return p
 
     def point(self,xloc,yloc,xe,ye,args=''):
         """Plot a point with errors.
@@ -86,8 +130,8 @@ class AutoXY(AreaXY):
             AreaXY.point(self,xloc,yloc,xe,ye,args=args)
         else:
             p = AutoXY_type_point(xloc,yloc,xe,ye,args=args)
-            (self.ll[0],self.ll[1],self.ur[0],self.ur[1]) = p.get_bb((self.ll[0],self.ll[1],self.ur[0],self.ur[1]))
-            self.__plots.append(p)
+            self.__add(p)
+            return p
 
     def plotsymbol(self,xloc,yloc,size='1',symbol='c',args=''):
         """Plot symbols.
@@ -102,8 +146,23 @@ class AutoXY(AreaXY):
             AreaXY.plotsymbol(self,xloc,yloc,size=size,symbol=symbol,args=args)
         else:
             p = AutoXY_type_symbols(args,xloc,yloc,size=size,symbol=symbol)
-            (self.ll[0],self.ll[1],self.ur[0],self.ur[1]) = p.get_bb((self.ll[0],self.ll[1],self.ur[0],self.ur[1]))
-            self.__plots.append(p)
+            self.__add(p)
+            return p
+
+    def symbols(self,xlocs,ylocs,size='1',symbol='c',attributes=None,args=''):
+        """Plot many groups of symbols with a single psxy call.
+
+        xlocs, ylocs: lists of lists/arrays of x and y locations, one per group
+        size:   single value or list giving size of symbols of each group (strings)
+        symbol: single symbol code or list giving symbol of each group
+        attributes: list of psxy options for each group or None
+        args:   more arguments
+        """
+        if (self.finalised):
+            AreaXY.symbols(self,xlocs,ylocs,size=size,symbol=symbol,attributes=attributes,args=args)
+        else:
+            p = AutoXY_type_symbolgroups(args,xlocs,ylocs,size=size,symbol=symbol,attributes=attributes)
+            self.__add(p)
 
     def image(self,grid,colourmap,args=''):
         """Create a colour image of a 2D grid.
@@ -116,8 +175,7 @@ class AutoXY(AreaXY):
             AreaXY.image(self,grid,colourmap,args=args)
         else:
             p = AutoXY_type_image(grid,colourmap,args=args)
-            (self.ll[0],self.ll[1],self.ur[0],self.ur[1]) = p.get_bb((self.ll[0],self.ll[1],self.ur[0],self.ur[1]))
-            self.__plots.append(p)
+            self.__add(p)
 
     def contour(self,grid,contours,args):
         """Plot contours of a 2D grid.
@@ -130,8 +188,7 @@ class AutoXY(AreaXY):
             AreaXY.contour(self,grid,contours,args)
         else:
             p = AutoXY_type_contour(grid,contours,args)
-            (self.ll[0],self.ll[1],self.ur[0],self.ur[1]) = p.get_bb((self.ll[0],self.ll[1],self.ur[0],self.ur[1]))
-            self.__plots.append(p)
+            self.__add(p)
 
 
     def finalise(self,expandx=False,expandy=False):
@@ -139,6 +196,9 @@ class AutoXY(AreaXY):
 
         i.e. set up region and do all the actual plotting.
         expandx, expandy: when set to True expand region to sensible value.
+
+        Lines and steps are reduced to the points visible at A.dpi (dots
+        per inch) if it is set.
         """
 
         # setup region
@@ -192,43 +252,129 @@ class AutoXY(AreaXY):
         AreaXY.coordsystem(self,grid=grid)
         
 
+def _bounds(x,y):
+    """Bounding box of the points with finite coordinates or None."""
+
+    valid = valid_rows([x,y])
+    if valid is not None and not valid.all():
+        x = x[valid]
+        y = y[valid]
+    if len(x) == 0:
+        return None
+    return (x.min(),y.min(),x.max(),y.max())
+
+def _merge_bb(bb,new_bb):
+    """Merge two bounding boxes, either of which may be None or contain Nones."""
+
+    if new_bb == None:
+        return bb
+    if bb == None:
+        return new_bb
+    new_bb = list(new_bb)
+    for i in range(0,2):
+        if bb[i] != None:
+            new_bb[i] = min(bb[i],new_bb[i])
+    for i in range(2,4):
+        if bb[i] != None:
+            new_bb[i] = max(bb[i],new_bb[i])
+    return tuple(new_bb)
+
 class AutoXY_type_line(object):
-    """class for line plots."""
+    """class for line plots.
+
+    The coordinates are kept as numpy arrays, arrays of floats passed in are
+    not copied until samples are appended."""
 
-    def __init__(self,args,xloc,yloc):
+    def __init__(self,args,xloc,yloc,dpi=None):
         """Initialise.
 
         args: arguments passed to psxy (for colours...)
-        x, y: point coordinates."""
+        x, y: point coordinates.
+        dpi: resolution used to reduce the line once the region is known"""
 
         self.args = args
-        self.xloc = []
-        self.yloc = []
-        for i in range(0,len(xloc)):
-            if xloc[i]!="nan" and yloc[i]!="nan":
-                if '%f'%xloc[i]!="nan" and '%f'%yloc[i]!="nan":
-                    self.xloc.append(xloc[i])
-                    self.yloc.append(yloc[i])
+        self.dpi = dpi
+        self._init_columns([xloc,yloc])
+
+    def _init_columns(self,columns):
+        """Store data columns, the first two are the x and y coordinates."""
+
+        self.__columns = [numpy.asarray(c,dtype=float) for c in columns]
+        for c in self.__columns[1:]:
+            if len(c) != len(self.__columns[0]):
+                raise ValueError, 'Expecting same length of arrays'
+        self.__n = len(self.__columns[0])
+        # arrays are only written to once they have been copied
+        self.__owned = False
+        self.bb = _bounds(self.__columns[0],self.__columns[1])
+
+    def append(self,*columns):
+        """Append samples.
+
+        columns: new values of all data columns
+
+        returns the bounding box of the new samples or None"""
+
+        new = [numpy.asarray(c,dtype=float) for c in columns]
+        if len(new) != len(self.__columns):
+            raise ValueError, 'Expecting %d columns'%len(self.__columns)
+        m = len(new[0])
+        for c in new[1:]:
+            if len(c) != m:
+                raise ValueError, 'Expecting same length of arrays'
+        n = self.__n
+        if not self.__owned or n+m > len(self.__columns[0]):
+            # grow geometrically so that appending is linear in the number of samples
+            size = max(2*(n+m),1024)
+            for i in range(0,len(self.__columns)):
+                c = numpy.empty(size,dtype=float)
+                c[:n] = self.__columns[i][:n]
+                self.__columns[i] = c
+            self.__owned = True
+        for i in range(0,len(new)):
+            self.__columns[i][n:n+m] = new[i]
+        self.__n = n+m
+        bb = _bounds(new[0],new[1])
+        self.bb = _merge_bb(self.bb,bb)
+        return bb
+
+    def columns(self,finite=True):
+        """Return data columns.
+
+        finite: if True, only points with finite coordinates are returned
+
+        arrays are views of the stored data unless points are dropped"""
+
+        columns = [c[:self.__n] for c in self.__columns]
+        if not finite:
+            return columns
+        valid = valid_rows(columns[:2])
+        if valid is not None and not valid.all():
+            columns = [c[valid] for c in columns]
+        return columns
+
+    def __get_xloc(self):
+        return self.__columns[0][:self.__n]
+    xloc = property(__get_xloc)
+
+    def __get_yloc(self):
+        return self.__columns[1][:self.__n]
+    yloc = property(__get_yloc)
 
     def get_bb(self,bb):
         """Get bounding box.
         bb: old bounding box"""
 
-        new_bb = [min(self.xloc),min(self.yloc),max(self.xloc),max(self.yloc)]
-        for i in range(0,2):
-            if bb[i] != None:
-                new_bb[i] = min(bb[i],new_bb[i])
-        for i in range(2,4):
-            if bb[i] != None:
-                new_bb[i] = max(bb[i],new_bb[i])        
-        return tuple(new_bb)
+        return _merge_bb(bb,self.bb)
 
     def plot(self,area):
         """Plot data.
 
         area: area to be used for plotting"""
 
-        area.line(self.args,self.xloc,self.yloc)
+        # lines are broken into segments where points are not finite
+        (x,y) = self.columns(finite=False)
+        area.line(self.args,x,y,dpi=self.dpi)
 
 class AutoXY_type_steps(AutoXY_type_line):
     """class for steps."""
@@ -238,7 +384,9 @@ class AutoXY_type_steps(AutoXY_type_line):
 
         area: area to be used for plotting"""
 
-        area.steps(self.args,self.xloc,self.yloc)
+        # lines are broken into segments where points are not finite
+        (x,y) = self.columns(finite=False)
+        area.steps(self.args,x,y,dpi=self.dpi)
 
 class AutoXY_type_symbols(AutoXY_type_line):
     """class for symbol plots."""
@@ -252,21 +400,91 @@ class AutoXY_type_symbols(AutoXY_type_line):
         symbol: list of or single symbol code, see manpage of psxy"""
         
         self.args = args
+        self._init_columns([xloc,yloc])
         self.size = size
         self.symbol = symbol
-        self.xloc = []
-        self.yloc = []
-        for i in range(0,len(xloc)):
-            if '%f'%xloc[i]!="nan" and '%f'%yloc[i]!="nan":
-                self.xloc.append(xloc[i])
-                self.yloc.append(yloc[i])
+
+    def append(self,*columns):
+        """Append samples.
+
+        columns: new values of all data columns
+
+        returns the bounding box of the new samples or None"""
+
+        if isinstance(self.size,list) or isinstance(self.symbol,list):
+            raise ValueError, 'Cannot append to symbols with individual sizes or codes'
+        return AutoXY_type_line.append(self,*columns)
 
     def plot(self,area):
         """Plot data.
 
         area: area to be used for plotting"""
 
-        area.plotsymbol(self.xloc,self.yloc,size=self.size,symbol=self.symbol,args=self.args)
+        size = self.size
+        symbol = self.symbol
+        # per symbol sizes and codes have to match the remaining points
+        valid = valid_rows([self.xloc,self.yloc])
+        if valid is not None and not valid.all():
+            if isinstance(size,list):
+                size = [size[i] for i in numpy.flatnonzero(valid)]
+            if isinstance(symbol,list):
+                symbol = [symbol[i] for i in numpy.flatnonzero(valid)]
+        (x,y) = self.columns()
+        area.plotsymbol(x,y,size=size,symbol=symbol,args=self.args)
+
+class AutoXY_type_lines(object):
+    """class for many lines plotted at once."""
+
+    def __init__(self,args,xlocs,ylocs,attributes=None):
+        """Initialise.
+
+        args: arguments passed to psxy (for colours...)
+        xlocs, ylocs: lists of point coordinates, one per line
+        attributes: list of psxy options for each line or None"""
+
+        self.args = args
+        self.xlocs = [numpy.asarray(x,dtype=float) for x in xlocs]
+        self.ylocs = [numpy.asarray(y,dtype=float) for y in ylocs]
+        self.attributes = attributes
+
+    def get_bb(self,bb):
+        """Get bounding box.
+        bb: old bounding box"""
+
+        for i in range(0,len(self.xlocs)):
+            bb = _merge_bb(bb,_bounds(self.xlocs[i],self.ylocs[i]))
+        return bb
+
+    def plot(self,area):
+        """Plot data.
+
+        area: area to be used for plotting"""
+
+        area.lines(self.args,self.xlocs,self.ylocs,attributes=self.attributes)
+
+class AutoXY_type_symbolgroups(AutoXY_type_lines):
+    """class for many groups of symbols plotted at once."""
+
+    def __init__(self,args,xlocs,ylocs,size='1',symbol='c',attributes=None):
+        """Initialise.
+
+        args: arguments passed to psxy (for colours...)
+        xlocs, ylocs: lists of point coordinates, one per group
+        size:   single value or list giving size of symbols of each group (strings)
+        symbol: single symbol code or list giving symbol of each group
+        attributes: list of psxy options for each group or None"""
+
+        AutoXY_type_lines.__init__(self,args,xlocs,ylocs,attributes=attributes)
+        self.size = size
+        self.symbol = symbol
+
+    def plot(self,area):
+        """Plot data.
+
+        area: area to be used for plotting"""
+
+        area.symbols(self.xlocs,self.ylocs,size=self.size,symbol=self.symbol,
+                     attributes=self.attributes,args=self.args)
 
 class AutoXY_type_image(object):
     """Class for image plots."""
@@ -286,14 +504,7 @@ class AutoXY_type_image(object):
         """Get bounding box.
         bb: old bounding box"""
 
-        new_bb = [self.grid.x_minmax[0],self.grid.y_minmax[0],self.grid.x_minmax[1],self.grid.y_minmax[1]]
-        for i in range(0,2):
-            if bb[i] != None:
-                new_bb[i] = min(bb[i],new_bb[i])
-        for i in range(2,4):
-            if bb[i] != None:
-                new_bb[i] = max(bb[i],new_bb[i])
-        return tuple(new_bb)
+        return _merge_bb(bb,(self.grid.x_minmax[0],self.grid.y_minmax[0],self.grid.x_minmax[1],self.grid.y_minmax[1]))
 
     def plot(self,area):
         """Plot data.
@@ -334,17 +545,7 @@ class AutoXY_type_point(AutoXY_type_line):
         xe:     list of x errors
         ye:     list of y errors"""
 
-        self.xloc = []
-        self.yloc = []
-        self.xe = []
-        self.ye = []
-        for i in range(0,len(xloc)):
-            if '%f'%xloc[i]!="nan" and '%f'%yloc[i]!="nan":
-                self.xloc.append(xloc[i])
-                self.yloc.append(yloc[i])
-                self.xe.append(xe[i])
-                self.ye.append(ye[i])
-
+        self._init_columns([xloc,yloc,xe,ye])
         self.args = args
 
     def plot(self,area):
@@ -352,4 +553,5 @@ class AutoXY_type_point(AutoXY_type_line):
 
         area: area to be used for plotting"""
 
-        area.point(self.xloc,self.yloc,self.xe,self.ye,args=self.args)
+        (x,y,xe,ye) = self.columns()
+        area.point(x,y,xe,ye,args=self.args)
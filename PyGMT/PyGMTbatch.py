@@ -0,0 +1,129 @@
+# Copyright 2004, Magnus Hagdorn
+#
+# This file is part of PyGMT.
+#
+# PyGMT is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# PyGMT is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyGMT; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""Rendering many figures in parallel."""
+
+__all__=['BatchResult','render']
+
+import time, traceback, multiprocessing, multiprocessing.util
+import PyGMTcanvas
+from PyGMTcanvas import Canvas
+from PyGMTcache import grid_cache, level_files
+
+# figures of the batch being rendered, inherited by the forked workers
+_figures = []
+
+def _init_worker():
+    """Set up a worker process."""
+
+    # workers do not run atexit handlers, so clean up their scratch files
+    # when the pool shuts them down
+    multiprocessing.util.Finalize(None, grid_cache.clear, exitpriority=0)
+    multiprocessing.util.Finalize(None, level_files.clear, exitpriority=0)
+    multiprocessing.util.Finalize(None, PyGMTcanvas._cleanup, exitpriority=0)
+
+def _render(i):
+    """Render figure i of the batch.
+
+    returns a tuple (i, error, time), error is None on success"""
+
+    t = time.time()
+    figure = _figures[i]
+    try:
+        if isinstance(figure,Canvas):
+            figure.close()
+        else:
+            figure()
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return (i, error, time.time()-t)
+
+class BatchResult(object):
+    """Outcome of rendering a batch of figures."""
+
+    def __init__(self,nfigures,processes):
+        """Initialise result.
+
+        nfigures: number of figures in the batch
+        processes: number of worker processes"""
+
+        self.nfigures = nfigures
+        self.processes = processes
+        # time spent on each figure
+        self.times = [None]*nfigures
+        # tracebacks of failed figures, keyed on the figure's index
+        self.errors = {}
+        # wall clock time of the whole batch
+        self.wall = 0.
+
+    def __str__(self):
+        if self.wall > 0.:
+            rate = self.nfigures/self.wall
+        else:
+            rate = 0.
+        return 'rendered %d figures (%d failed) in %.2fs using %d processes, %.2f figures/s'%(
+            self.nfigures, len(self.errors), self.wall, self.processes, rate)
+
+    def failed(self):
+        """Return True if any figure failed."""
+        return len(self.errors) > 0
+
+def render(figures,processes=None):
+    """Render figures in parallel.
+
+    figures: list of figures, each either a callable which creates, draws and closes
+             a Canvas or a deferred Canvas whose recorded commands are run
+    processes: number of worker processes, defaults to the number of CPUs. With 1
+               process the figures are rendered one after the other in this process.
+    on return: a BatchResult, errors of single figures are collected rather than raised
+
+    Workers are forked, so figures do not need to be picklable and grid cache files
+    written before calling render are shared by all workers."""
+
+    global _figures
+
+    if processes == None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1,min(processes,len(figures)))
+    result = BatchResult(len(figures),processes)
+
+    t = time.time()
+    _figures = list(figures)
+    try:
+        if processes == 1:
+            outcome = map(_render,range(len(_figures)))
+        else:
+            pool = multiprocessing.Pool(processes,_init_worker)
+            try:
+                outcome = pool.map(_render,range(len(_figures)),chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        for (i,error,elapsed) in outcome:
+            result.times[i] = elapsed
+            if error != None:
+                result.errors[i] = error
+    finally:
+        # deferred canvases rendered by the workers are finished
+        for figure in _figures:
+            if isinstance(figure,Canvas):
+                figure.release()
+        _figures = []
+    result.wall = time.time()-t
+    return result
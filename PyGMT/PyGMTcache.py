@@ -0,0 +1,504 @@
+# Copyright 2004, Magnus Hagdorn
+#
+# This file is part of PyGMT.
+#
+# PyGMT is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# PyGMT is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyGMT; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""Caches shared by all PyGMT objects of a process."""
+
+__all__=['GridFileCache','grid_cache','ResultCache','result_cache','ContourCache','contour_cache',
+         'LevelFileCache','level_files']
+
+import os, tempfile, threading, atexit, hashlib
+from collections import OrderedDict
+from PyGMTcommand import getGMTpath
+
+def _scratch_base():
+    """Directory for scratch files, RAM backed if possible."""
+
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm',os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+class _ScratchDirectory(object):
+    """Directory for scratch files of one process.
+
+    The directory is created on first use. Forked processes get their own
+    directory, files in the directory of a parent process are left alone.
+    """
+
+    def __init__(self,prefix):
+        """Initialise scratch directory.
+
+        prefix: prefix of the directory name"""
+
+        self.prefix = prefix
+        self.__dir = None
+        self.__pid = None
+
+    def path(self,name):
+        """Return full path of file name in the scratch directory."""
+
+        if self.__dir == None or self.__pid != os.getpid():
+            self.__dir = tempfile.mkdtemp(prefix=self.prefix,dir=_scratch_base())
+            self.__pid = os.getpid()
+        return os.path.join(self.__dir,name)
+
+    def owns(self,name):
+        """Return True if file name was created by this process."""
+
+        return self.__dir != None and self.__pid == os.getpid() and os.path.dirname(name) == self.__dir
+
+    def remove(self,name):
+        """Remove file name if it was created by this process."""
+
+        if self.owns(name):
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+
+    def cleanup(self):
+        """Remove the directory if it was created by this process."""
+
+        if self.__dir != None and self.__pid == os.getpid():
+            try:
+                os.rmdir(self.__dir)
+            except OSError:
+                pass
+            self.__dir = None
+
+class GridFileCache(object):
+    """Cache of grids serialised to GMT native binary files.
+
+    Grids are identified by their fingerprint, so a grid which is plotted
+    several times is only written once. The files are kept in RAM backed
+    storage (/dev/shm) if available and are removed when the process exits.
+    """
+
+    def __init__(self,maxsize=512*1024*1024):
+        """Initialise cache.
+
+        maxsize: maximum size of all cached files in bytes, least recently
+                 used files are removed first"""
+
+        self.maxsize = maxsize
+        # if False, areas pipe grids into GMT programs instead
+        self.enabled = True
+        self.__entries = OrderedDict()
+        self.__pinned = {}
+        self.__size = 0
+        self.__scratch = _ScratchDirectory('pygmt-')
+        self.__lock = threading.RLock()
+
+    def __remove(self,key):
+        (name,size) = self.__entries.pop(key)
+        self.__size = self.__size - size
+        self.__scratch.remove(name)
+
+    def __pin(self,key,pin):
+        if pin:
+            self.__pinned[key] = self.__pinned.get(key,0) + 1
+
+    def path(self,grid,pin=False,fingerprint=None):
+        """Return name of a GMT native binary file containing grid.
+
+        grid: the grid, it is only written if it is not in the cache
+        pin: if True, the file is not evicted until it is released with unpin
+        fingerprint: fingerprint of grid if already known"""
+
+        if fingerprint == None:
+            fingerprint = grid.fingerprint()
+        key = fingerprint
+        self.__lock.acquire()
+        try:
+            if key in self.__entries:
+                (name,size) = self.__entries[key]
+                if os.path.exists(name):
+                    # move to the end of the LRU list
+                    del self.__entries[key]
+                    self.__entries[key] = (name,size)
+                    self.__pin(key,pin)
+                    return name
+                self.__remove(key)
+
+            name = self.__scratch.path('%s.grd'%key)
+            tmpname = name+'.tmp'
+            grdfile = open(tmpname,'wb')
+            try:
+                grid.write(grdfile)
+            finally:
+                grdfile.close()
+            os.rename(tmpname,name)
+            size = os.path.getsize(name)
+            self.__entries[key] = (name,size)
+            self.__size = self.__size + size
+            self.__pin(key,pin)
+
+            # make room, but keep the grid just written and pinned grids
+            for k in self.__entries.keys():
+                if self.__size <= self.maxsize:
+                    break
+                if k != key and k not in self.__pinned:
+                    self.__remove(k)
+            return name
+        finally:
+            self.__lock.release()
+
+    def unpin(self,name):
+        """Release a file pinned by path.
+
+        name: file name returned by path"""
+
+        key = os.path.splitext(os.path.basename(name))[0]
+        self.__lock.acquire()
+        try:
+            if key in self.__pinned:
+                self.__pinned[key] = self.__pinned[key] - 1
+                if self.__pinned[key] <= 0:
+                    del self.__pinned[key]
+        finally:
+            self.__lock.release()
+
+    def clear(self):
+        """Remove all cached files."""
+
+        self.__lock.acquire()
+        try:
+            for k in self.__entries.keys():
+                self.__remove(k)
+            self.__pinned = {}
+            self.__scratch.cleanup()
+        finally:
+            self.__lock.release()
+
+# the process wide grid file cache
+grid_cache = GridFileCache()
+atexit.register(grid_cache.clear)
+
+class LevelFileCache(object):
+    """Store of contour level files.
+
+    Files are named after the digest of their contents, so each set of
+    contour levels is only written once. The files are removed when the
+    process exits.
+    """
+
+    def __init__(self):
+        """Initialise store."""
+
+        self.__entries = {}
+        self.__scratch = _ScratchDirectory('pygmt-levels-')
+        self.__lock = threading.RLock()
+
+    def path(self,levels,cntrtype='c'):
+        """Return name of a file containing contour levels.
+
+        levels: list of contour levels
+        cntrtype: contour type, c for normal contour, a for annotated"""
+
+        data = ''.join(["%f\t%s\n"%(float(c),cntrtype) for c in levels])
+        key = hashlib.sha1(data).hexdigest()
+        self.__lock.acquire()
+        try:
+            name = self.__entries.get(key)
+            if name != None and os.path.exists(name):
+                return name
+
+            name = self.__scratch.path('%s.cntr'%key)
+            tmpname = name+'.tmp'
+            cntrfile = open(tmpname,'w')
+            try:
+                cntrfile.write(data)
+            finally:
+                cntrfile.close()
+            os.rename(tmpname,name)
+            self.__entries[key] = name
+            return name
+        finally:
+            self.__lock.release()
+
+    def clear(self):
+        """Remove all files written by this process."""
+
+        self.__lock.acquire()
+        try:
+            for name in self.__entries.values():
+                self.__scratch.remove(name)
+            self.__scratch.cleanup()
+            self.__entries = {}
+        finally:
+            self.__lock.release()
+
+# the process wide store of contour level files
+level_files = LevelFileCache()
+atexit.register(level_files.clear)
+
+class ResultCache(object):
+    """Cache of the output of GMT commands which do not plot.
+
+    Commands like mapproject, minmax and grdtrack always produce the same
+    output given the same arguments and input. Their output is kept in
+    memory and, if directory is set, in files in that directory, which can
+    be shared by several processes. The cache is disabled by default.
+    """
+
+    def __init__(self,maxsize=64*1024*1024,directory=None,disksize=1024*1024*1024):
+        """Initialise cache.
+
+        maxsize: maximum size of the results kept in memory in bytes
+        directory: directory of the on-disk cache, None for memory only
+        disksize: maximum size of the on-disk cache in bytes"""
+
+        self.maxsize = maxsize
+        self.directory = directory
+        self.disksize = disksize
+        self.enabled = False
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.RLock()
+
+    def key(self,program,arguments,indata='',context=''):
+        """Return key of a command.
+
+        program: name of the GMT command
+        arguments: string containing arguments for GMT command
+        indata: data piped into GMT command
+        context: anything else the output depends on, e.g. GMT settings"""
+
+        prog = os.path.join(getGMTpath(),program)
+        digest = hashlib.sha1()
+        for item in [prog, str(os.stat(prog).st_mtime), context, arguments]:
+            digest.update(item)
+            digest.update('\0')
+        digest.update(indata)
+        return digest.hexdigest()
+
+    def get(self,key):
+        """Return cached output of command key or None."""
+
+        self.__lock.acquire()
+        try:
+            if key in self.__entries:
+                value = self.__entries.pop(key)
+                self.__entries[key] = value
+                return value
+        finally:
+            self.__lock.release()
+        if self.directory != None:
+            name = os.path.join(self.directory,key)
+            try:
+                f = open(name,'rb')
+            except IOError:
+                return None
+            try:
+                value = f.read()
+            finally:
+                f.close()
+            # mark as recently used
+            try:
+                os.utime(name,None)
+            except OSError:
+                pass
+            self.__store(key,value)
+            return value
+        return None
+
+    def __store(self,key,value):
+        if len(value) > self.maxsize:
+            return
+        self.__lock.acquire()
+        try:
+            if key in self.__entries:
+                self.__size = self.__size - len(self.__entries.pop(key))
+            self.__entries[key] = value
+            self.__size = self.__size + len(value)
+            while self.__size > self.maxsize:
+                (k,v) = self.__entries.popitem(last=False)
+                self.__size = self.__size - len(v)
+        finally:
+            self.__lock.release()
+
+    def put(self,key,value):
+        """Store output value of command key."""
+
+        self.__store(key,value)
+        if self.directory != None:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            name = os.path.join(self.directory,key)
+            (fd,tmpname) = tempfile.mkstemp(dir=self.directory,prefix='.tmp')
+            f = os.fdopen(fd,'wb')
+            try:
+                f.write(value)
+            finally:
+                f.close()
+            os.rename(tmpname,name)
+            self.__evict()
+
+    def __evict(self):
+        """Remove least recently used files until the disk cache is small enough."""
+
+        files = []
+        total = 0
+        for k in os.listdir(self.directory):
+            if k.startswith('.tmp'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory,k))
+            except OSError:
+                continue
+            files.append((st.st_mtime,k,st.st_size))
+            total = total + st.st_size
+        files.sort()
+        for (mtime,k,size) in files:
+            if total <= self.disksize:
+                break
+            try:
+                os.remove(os.path.join(self.directory,k))
+            except OSError:
+                pass
+            total = total - size
+
+    def call(self,function,program,arguments,indata='',context='',keyargs=None,**kw):
+        """Run a command through the cache.
+
+        function: function running the command, e.g. command
+        program: name of the GMT command
+        arguments: string containing arguments for GMT command
+        indata: data piped into GMT command
+        context: anything else the output depends on, e.g. GMT settings
+        keyargs: arguments used for the key instead of arguments, e.g. with
+                 temporary file names replaced
+        further keyword arguments are passed to function"""
+
+        if not self.enabled:
+            return function(program,arguments,indata=indata,**kw)
+        if keyargs == None:
+            keyargs = arguments
+        key = self.key(program,keyargs,indata,context)
+        value = self.get(key)
+        if value == None:
+            value = function(program,arguments,indata=indata,**kw)
+            self.put(key,value)
+        return value
+
+    def clear(self):
+        """Remove all results kept in memory."""
+
+        self.__lock.acquire()
+        try:
+            self.__entries = OrderedDict()
+            self.__size = 0
+        finally:
+            self.__lock.release()
+
+# the process wide cache of command output
+result_cache = ResultCache()
+
+class ContourCache(object):
+    """Cache of contour polygons of grids.
+
+    Polygons are identified by the grid fingerprint and the contour level,
+    so clipping several areas to the same contour of an unchanged grid only
+    extracts the contour once. Data derived from the polygons, e.g. the
+    input of psclip, can be kept as well.
+    """
+
+    def __init__(self,maxsize=64*1024*1024):
+        """Initialise cache.
+
+        maxsize: maximum size of the cached data in bytes, least recently
+                 used entries are removed first"""
+
+        self.maxsize = maxsize
+        self.enabled = True
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.RLock()
+
+    def get(self,key):
+        """Return value stored under key or None."""
+
+        if not self.enabled:
+            return None
+        self.__lock.acquire()
+        try:
+            if key in self.__entries:
+                value = self.__entries.pop(key)
+                self.__entries[key] = value
+                return value[0]
+        finally:
+            self.__lock.release()
+        return None
+
+    def put(self,key,value):
+        """Store value, a string or a list of polygons, under key."""
+
+        if not self.enabled:
+            return
+        if isinstance(value,str):
+            size = len(value)
+        else:
+            size = sum([p[0].nbytes+p[1].nbytes for p in value])
+        if size > self.maxsize:
+            return
+        self.__lock.acquire()
+        try:
+            if key in self.__entries:
+                self.__size = self.__size - self.__entries.pop(key)[1]
+            self.__entries[key] = (value,size)
+            self.__size = self.__size + size
+            while self.__size > self.maxsize:
+                (k,v) = self.__entries.popitem(last=False)
+                self.__size = self.__size - v[1]
+        finally:
+            self.__lock.release()
+
+    def contours(self,grid,level,fingerprint=None):
+        """Return contour polygons of grid, see Grid.contours.
+
+        grid: GMT grid
+        level: contour level
+        fingerprint: fingerprint of grid if already known
+
+        the returned arrays are shared and must not be modified"""
+
+        if not self.enabled:
+            return grid.contours(level)
+        if fingerprint == None:
+            fingerprint = grid.fingerprint()
+        key = ('contours',fingerprint,float(level))
+        polygons = self.get(key)
+        if polygons == None:
+            polygons = grid.contours(level)
+            for (x,y) in polygons:
+                x.flags.writeable = False
+                y.flags.writeable = False
+            self.put(key,polygons)
+        return polygons
+
+    def clear(self):
+        """Remove all entries."""
+
+        self.__lock.acquire()
+        try:
+            self.__entries = OrderedDict()
+            self.__size = 0
+        finally:
+            self.__lock.release()
+
+# the process wide cache of contour polygons
+contour_cache = ContourCache()
@@ -21,7 +21,27 @@
 __all__=['Canvas','PaperSize']
 
 from PyGMTcommand import *
-import os
+from PyGMTcommand import _caller
+from PyGMTcache import grid_cache
+import os, shutil, tempfile, atexit
+
+# GMT state files copied to the scratch directory if the canvas is not reset
+_GMTFILES = ['.gmtdefaults4','.gmtcommands4','.gmtdefaults','.gmtcommands']
+
+# scratch directories of canvases which have not been closed yet
+_scratch = {}
+
+def _remove_scratch(tmpdir):
+    """Remove a canvas scratch directory."""
+
+    if _scratch.pop(tmpdir,None) == os.getpid():
+        shutil.rmtree(tmpdir,ignore_errors=True)
+
+def _cleanup():
+    for tmpdir in _scratch.keys():
+        _remove_scratch(tmpdir)
+
+atexit.register(_cleanup)
 
 
 def PaperSize(size,orientation):
@@ -41,42 +61,151 @@ class Canvas:
 
 
     """
-    def __init__(self,name,size='A4',orientation='portrait',reset=True):
+    def __init__(self,name,size='A4',orientation='portrait',reset=True,deferred=False):
         """Initialise new GMT output.
 
         name: name of postscript file to be written to
         size: paper size (default A4)
         orientation: orientation of output media (default portrait)
-        reset: if True .gmtdefaults and .gmtcommands is deleted and thus reset to global settings"""
+        reset: if True start from the global settings, otherwise from the .gmtdefaults and
+               .gmtcommands files in the current directory
+        deferred: if True, plot commands are only recorded and run when the canvas is closed
 
-        # getting rid of GMT files
-        if reset:
-            try:
-                os.remove('.gmtcommands')
-            except:
-                pass
-            try:
-                os.remove('.gmtdefaults')
-            except:
-                pass
+        Every canvas keeps its GMT state (.gmtdefaults4 and .gmtcommands4) in a private
+        scratch directory passed to GMT via GMT_TMPDIR, so several canvases can be
+        rendered at the same time."""
+
+        # private GMT state
+        self.tmpdir = tempfile.mkdtemp(prefix='pygmt-canvas-')
+        _scratch[self.tmpdir] = os.getpid()
+        if not reset:
+            for f in _GMTFILES:
+                if os.path.exists(f):
+                    shutil.copy(f,self.tmpdir)
+        self.env = os.environ.copy()
+        self.env['GMT_TMPDIR'] = self.tmpdir
 
         # setting up basic defaults
-        self.defaults = Defaults()
+        self.defaults = Defaults(env=self.env)
         self.defaults['PAPER_MEDIA'] = size
         self.defaults['PAGE_ORIENTATION'] = orientation
         self.papersize = PaperSize(size,orientation)
 
         self.verbose = False
+        # trace records of all GMT commands run by the canvas, see command
+        self.trace = []
+        # pass numeric data to GMT as binary tables
+        self.binary = False
+        # recorded plot commands and the grid cache files they read until they are run
+        self.deferred = deferred
+        self.__queue = []
+        self.__pinned = []
+        # areas with buffered text
+        self.__buffered = []
         #start a new plot
         self.name = name
-        command('pstext','-JX1 -R0/1/0/1 -K > %s'%self.name,'0 0 10 0 0 0 ',warn=False)
+        arg = '%s -JX1 -R0/1/0/1 -K'%self.defaults.overrides()
+        if self.deferred:
+            self.__queue.append(('pstext',arg,'0 0 10 0 0 0 ',False,False,'Canvas.__init__'))
+        else:
+            command('pstext','%s > %s'%(arg,self.name),'0 0 10 0 0 0 ',warn=False,env=self.env,
+                    trace=self.trace,caller='Canvas.__init__')
 
         #setting position
         self.pos = [0.,0.]
+
+    def command(self,com,arguments,indata='',verbose=False,defaults=None):
+        """Run a GMT command which does not plot, using the GMT state of the canvas.
+
+        com: name of the GMT command
+        arguments: string containing arguments for GMT command
+        indata: data piped into GMT command
+        verbose: if True, print command
+        defaults: Defaults passed to the command, defaults to the canvas defaults
+        on success: returns the output of the GMT command"""
+
+        if defaults == None:
+            defaults = self.defaults
+        arguments = '%s %s'%(defaults.overrides(),arguments)
+        return command(com,arguments,indata=indata,verbose=verbose,env=self.env,trace=self.trace)
+
+    def plotcom(self,com,arguments,indata='',verbose=False,pinned=None,defaults=None):
+        """Run a GMT command appending to the postscript file.
+
+        com: name of the GMT command
+        arguments: string containing arguments for GMT command
+        indata: data piped into GMT command
+        verbose: if True, print command
+        pinned: name of a pinned grid cache file used by the command, it is
+                unpinned once the command has run
+        defaults: Defaults passed to the command, defaults to the canvas defaults
+
+        In deferred mode the command is recorded and run by close."""
+
+        if defaults == None:
+            defaults = self.defaults
+        arguments = '%s %s'%(defaults.overrides(),arguments)
+
+        if self.deferred:
+            self.__queue.append((com,arguments,indata,verbose,True,_caller()))
+            if pinned != None:
+                self.__pinned.append(pinned)
+        else:
+            try:
+                command(com,'%s >> %s'%(arguments,self.name),indata=indata,verbose=verbose,env=self.env,
+                        trace=self.trace)
+            finally:
+                if pinned != None:
+                    grid_cache.unpin(pinned)
         
+    def register_buffer(self,area):
+        """Flush the text buffer of area when the canvas is closed."""
+
+        self.__buffered.append(area)
+
     def close(self):
         """Finishing off GMT plot."""
 
-        #start a new plot
-        command('pstext','-JX1 -R0/1/0/1 -O >> %s'%self.name,'0 0 10 0 0 0 ',warn=False)
+        # plotting buffered text
+        for area in self.__buffered:
+            area.flushtext()
+        self.__buffered = []
+
+        if not self.deferred:
+            try:
+                command('pstext','%s -JX1 -R0/1/0/1 -O >> %s'%(self.defaults.overrides(),self.name),
+                        '0 0 10 0 0 0 ',warn=False,env=self.env,trace=self.trace,caller='Canvas.close')
+            finally:
+                _remove_scratch(self.tmpdir)
+            return
+
+        # run all recorded commands writing to the postscript file opened once
+        self.__queue.append(('pstext','%s -JX1 -R0/1/0/1 -O'%self.defaults.overrides(),
+                             '0 0 10 0 0 0 ',False,False,'Canvas.close'))
+        psfile = open(self.name,'wb')
+        try:
+            for (com,arguments,indata,verbose,warn,caller) in self.__queue:
+                command(com,arguments,indata=indata,verbose=verbose,warn=warn,stdout=psfile,env=self.env,
+                        trace=self.trace,caller=caller)
+        finally:
+            psfile.close()
+            self.release()
+
+    def report(self,n=10):
+        """Return a summary of the GMT commands run so far.
+
+        n: number of the slowest commands listed"""
+
+        return trace_report(self.trace,n)
+
+    def release(self):
+        """Drop recorded commands without running them and remove the scratch directory.
+
+        Used once a deferred canvas has been rendered by another process."""
+
+        _remove_scratch(self.tmpdir)
+        for name in self.__pinned:
+            grid_cache.unpin(name)
+        self.__queue = []
+        self.__pinned = []
         
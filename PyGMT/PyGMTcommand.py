@@ -20,21 +20,304 @@
 
 """
 
-__all__=['command','gridcommand','Defaults','getGMTpath']
+__all__=['command','gridcommand','Defaults','getGMTpath','add_hook','remove_hook','trace_report']
 
-import os,popen2,fcntl,select, warnings
-from cStringIO import StringIO
+import os, re, sys, time, resource, fcntl, select, errno, shlex, subprocess, threading, warnings
+
+# smallest and largest chunk written to a child's stdin in one go
+_CHUNK_MIN = 64*1024
+_CHUNK_MAX = 4*1024*1024
+# size of reads from the child's stdout/stderr
+_READSIZE = 256*1024
+# characters which need a shell to interpret the argument string,
+# including glob patterns and brace expansion
+_SHELL_CHARS = '|&;<`$*?[]{}'
+# redirections of other file descriptors, e.g. 2>/dev/null or 1>>log
+_FD_REDIRECT = re.compile(r'(^|\s)\d+>')
+
+# location of GMT binaries, keyed on the search path
+_gmtpath = {}
+
+# parsed output of gmtdefaults -L, see _defaults_key
+_defaults_table = {}
+
+# callbacks receiving the trace record of every GMT command
+_hooks = []
+# methods which only pass plot commands on, skipped when looking for the caller
+_WRAPPERS = ['GMTcommand','canvascom','gridcom']
 
 def getGMTpath():
-    """Find the path to GMT binaries."""
+    """Find the path to GMT binaries.
+
+    The path is only searched once for each value of $PATH."""
 
-    path = os.environ['PATH'].split(':')
-    for p in path:
+    searchpath = os.environ.get('PATH','')
+    try:
+        return _gmtpath[searchpath]
+    except KeyError:
+        pass
+    for p in searchpath.split(':'):
         if os.path.exists(os.path.join(p,'gmtset')):
+            _gmtpath[searchpath] = p
             return p
     raise RuntimeError, 'Cannot find gmt binaries'
-    
-def command(command, arguments, indata='', verbose=False, warn=True):
+
+def _parse_arguments(arguments):
+    """Split argument string into an argument list and an output redirection.
+
+    arguments: string containing arguments for GMT command
+
+    returns a tuple (args, redirect) where redirect is None or a tuple
+    (filename, mode). None is returned if the argument string can only be
+    interpreted by a shell."""
+
+    for c in _SHELL_CHARS:
+        if c in arguments:
+            return None
+    if _FD_REDIRECT.search(arguments):
+        return None
+    try:
+        tokens = shlex.split(arguments)
+    except ValueError:
+        return None
+
+    args = []
+    redirect = None
+    i = 0
+    while i < len(tokens):
+        t = tokens[i]
+        if t.startswith('>'):
+            if redirect != None:
+                return None
+            if t.startswith('>>'):
+                mode = 'ab'
+                name = t[2:]
+            else:
+                mode = 'wb'
+                name = t[1:]
+            if name == '':
+                i = i + 1
+                if i == len(tokens):
+                    return None
+                name = tokens[i]
+            redirect = (name,mode)
+        elif t.startswith('~') or '>' in t:
+            return None
+        else:
+            args.append(t)
+        i = i + 1
+    return (args,redirect)
+
+def _feed(writer, pipe, failed):
+    """Run writer on pipe and close pipe afterwards.
+
+    Exceptions are appended to the list failed."""
+
+    try:
+        try:
+            writer(pipe)
+        except IOError, e:
+            # the child exited without reading all its input
+            if e.errno != errno.EPIPE:
+                failed.append(e)
+        except Exception, e:
+            failed.append(e)
+    finally:
+        try:
+            pipe.close()
+        except IOError:
+            pass
+
+def _execute(argv, indata='', stdout=None, env=None):
+    """Run a program and collect its output.
+
+    argv: program and arguments
+    indata: string piped into the program or a callable which is run in a
+            separate thread and gets passed the pipe to the program's stdin
+    stdout: file object receiving the output, if None the output is returned
+    env: environment of the program, if None the current environment is used
+
+    returns a tuple (exit code, output, error output)"""
+
+    if stdout == None:
+        outpipe = subprocess.PIPE
+    else:
+        outpipe = stdout
+    try:
+        child = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=outpipe,
+                                 stderr=subprocess.PIPE, close_fds=True, env=env)
+    except OSError, e:
+        raise RuntimeError, 'Cannot execute %s\n%s' % (argv[0], e)
+
+    outdata = bytearray()
+    errdata = bytearray()
+    buffers = {}
+    poller = select.poll()
+    if stdout == None:
+        buffers[child.stdout.fileno()] = outdata
+    buffers[child.stderr.fileno()] = errdata
+    for fd in buffers:
+        poller.register(fd, select.POLLIN|select.POLLPRI)
+
+    # sort out input
+    feeder = None
+    failed = []
+    infd = None
+    if callable(indata):
+        feeder = threading.Thread(target=_feed, args=(indata, child.stdin, failed))
+        feeder.setDaemon(True)
+        feeder.start()
+    elif len(indata) == 0:
+        child.stdin.close()
+    else:
+        infd = child.stdin.fileno()
+        fl = fcntl.fcntl(infd, fcntl.F_GETFL)
+        fcntl.fcntl(infd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+        poller.register(infd, select.POLLOUT)
+    offset = 0
+    chunksize = _CHUNK_MIN
+
+    # poll until both output streams are exhausted and all input is written
+    while len(buffers) > 0 or infd != None:
+        for (fd,event) in poller.poll():
+            if fd == infd:
+                done = event & (select.POLLERR|select.POLLHUP)
+                if not done:
+                    try:
+                        n = os.write(fd, buffer(indata, offset, chunksize))
+                    except OSError, e:
+                        if e.errno == errno.EAGAIN:
+                            continue
+                        if e.errno != errno.EPIPE:
+                            raise
+                        n = 0
+                        done = True
+                    # grow the chunk size while the pipe keeps up
+                    if n == chunksize and chunksize < _CHUNK_MAX:
+                        chunksize = 2*chunksize
+                    offset = offset + n
+                    if offset >= len(indata):
+                        done = True
+                if done:
+                    poller.unregister(fd)
+                    child.stdin.close()
+                    infd = None
+            else:
+                chunk = os.read(fd, _READSIZE)
+                if chunk == '':
+                    poller.unregister(fd)
+                    del buffers[fd]
+                else:
+                    buffers[fd].extend(chunk)
+
+    err = child.wait()
+    if feeder != None:
+        feeder.join()
+        if len(failed) > 0 and err == 0:
+            raise failed[0]
+    return (err, str(outdata), str(errdata))
+
+def add_hook(hook):
+    """Call hook with the trace record of every GMT command run from now on.
+
+    hook: callable taking a dictionary, see command"""
+
+    _hooks.append(hook)
+
+def remove_hook(hook):
+    """Stop calling hook."""
+
+    _hooks.remove(hook)
+
+def _caller():
+    """Return name of the area method which issued the current command or None.
+
+    Area methods call each other, the outermost of the innermost chain of
+    area method calls is reported."""
+
+    caller = None
+    frame = sys._getframe(1)
+    while frame != None:
+        obj = frame.f_locals.get('self')
+        if obj != None and hasattr(obj,'canvas'):
+            if frame.f_code.co_name not in _WRAPPERS:
+                caller = '%s.%s'%(obj.__class__.__name__,frame.f_code.co_name)
+        elif caller != None:
+            # the chain ends where something other than an area called it
+            break
+        frame = frame.f_back
+    return caller
+
+def _filesize(f):
+    return os.fstat(f.fileno()).st_size
+
+def _run(command, arguments, indata, verbose, warn, stdout=None, env=None, trace=None, caller=None):
+    """Execute GMT command, see command."""
+
+    com = os.path.join(getGMTpath(), command)
+    if verbose:
+        print com + ' ' + arguments
+
+    parsed = _parse_arguments(arguments)
+    if parsed == None:
+        argv = ['/bin/sh', '-c', com + ' ' + arguments]
+        redirect = None
+    else:
+        argv = [com] + parsed[0]
+        redirect = parsed[1]
+
+    if redirect != None:
+        outfile = open(redirect[0], redirect[1])
+    else:
+        outfile = stdout
+    tracing = trace != None or len(_hooks) > 0
+    if tracing:
+        if outfile != None:
+            size = _filesize(outfile)
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        wall = time.time()
+    try:
+        (err, outdata, errdata) = _execute(argv, indata=indata, stdout=outfile, env=env)
+        if tracing:
+            wall = time.time() - wall
+            cpu = resource.getrusage(resource.RUSAGE_CHILDREN)
+            if outfile != None:
+                nout = _filesize(outfile) - size
+            else:
+                nout = len(outdata)
+    finally:
+        if redirect != None:
+            outfile.close()
+
+    if tracing:
+        if callable(indata):
+            nin = None
+        else:
+            nin = len(indata)
+        if caller == None:
+            caller = _caller()
+        record = {'program' : command,
+                  'arguments' : arguments,
+                  'wall' : wall,
+                  'cpu' : cpu.ru_utime + cpu.ru_stime - usage.ru_utime - usage.ru_stime,
+                  'bytes_in' : nin,
+                  'bytes_out' : nout,
+                  'bytes_err' : len(errdata),
+                  'exit_code' : err,
+                  'caller' : caller}
+        if trace != None:
+            trace.append(record)
+        for hook in _hooks:
+            hook(record)
+
+    if err != 0: 
+        raise RuntimeError, '%s failed w/ exit code %d\n%s' % (command, err, errdata)
+    if len(errdata) > 0 and warn:
+        warnings.warn('%s\n%s' %(command, errdata), RuntimeWarning)
+    return outdata
+
+def command(command, arguments, indata='', verbose=False, warn=True, stdout=None, env=None,
+            trace=None, caller=None):
     """Execute GMT command.
 
     command: name of the GMT command
@@ -42,65 +325,22 @@ def command(command, arguments, indata='', verbose=False, warn=True):
     indata: data piped into GMT command
     verbose: if True, print command
     warn: if True, print warnings
+    stdout: file object the output is written to unless arguments redirect it
+    env: environment of the GMT command, e.g. to set GMT_TMPDIR
+    trace: list the trace record of the command is appended to
+    caller: name of the calling area method recorded in the trace, found from the stack if None
     on success: this function returns the output of the GMT command
+
+    The trace record passed to trace and the hooks is a dictionary with the keys
+    program, arguments, wall (wall clock time in s), cpu (CPU time of the program
+    in s, only exact if no other commands run at the same time), bytes_in (None if
+    the input is written by a callable), bytes_out, bytes_err, exit_code and caller.
     """
 
-    # helper function for non-blocking I/O
-    def makeNonBlocking(fd):
-        fl = fcntl.fcntl(fd, fcntl.F_GETFL)
-        fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NDELAY)
+    return _run(command, arguments, indata, verbose, warn, stdout, env, trace, caller)
 
-    path_to_gmt = getGMTpath()
-    com = os.path.join(path_to_gmt, command) + ' ' + arguments
-    if verbose:
-        print com
-    # capture stdout and stderr from command
-    child = popen2.Popen3(com, True)         
-    infile = child.tochild
-    infd = infile.fileno()
-    outfile = child.fromchild 
-    outfd = outfile.fileno()
-    errfile = child.childerr
-    errfd = errfile.fileno()
-    # don't deadlock!
-    makeNonBlocking(infd)            
-    makeNonBlocking(outfd)            
-    makeNonBlocking(errfd)
-    outdata = StringIO()
-    errdata = StringIO()
-    outeof = erreof = 0
-    chunksize = 1000
-    i=0
-    while 1:
-        if infile.closed:
-            ready = select.select([outfd,errfd],[],[]) # wait for input
-        else:
-            ready = select.select([outfd,errfd],[infd],[]) # wait for input             
-        if outfd in ready[0]:
-	    outchunk = outfile.read()
-	    if outchunk == '': outeof = 1
-	    outdata.write(outchunk)
-	if errfd in ready[0]:
-	    errchunk = errfile.read()
-	    if errchunk == '': erreof = 1
-	    errdata.write(errchunk)
-        if child.poll()>=0: break
-        if not infile.closed:
-            if infd in ready[1]:
-                end = min((i+1)*chunksize,len(indata))
-                if i*chunksize<end:
-                    infile.write(indata[i*chunksize:end])
-                    i = i+1
-                else:
-                    infile.close()
-    err = child.wait()
-    if err != 0: 
-	raise RuntimeError, '%s failed w/ exit code %d\n%s' % (command, err, errdata.getvalue())
-    if len(errdata.getvalue()) > 0 and err == 0 and warn:
-        warnings.warn('%s\n%s' %(command, errdata.getvalue()), RuntimeWarning)
-    return outdata.getvalue()
-
-def gridcommand(command, arguments, grid, verbose=False, warn=True):
+def gridcommand(command, arguments, grid, verbose=False, warn=True, stdout=None, env=None,
+                trace=None, caller=None):
     """Execute GMT command requiring a GMT grid.
 
     command: name of the GMT command
@@ -108,113 +348,164 @@ def gridcommand(command, arguments, grid, verbose=False, warn=True):
     grid: GMT grid to be piped into GMT command
     verbose: if True, print command
     warn: if True, print warnings
+    stdout: file object the output is written to unless arguments redirect it
+    env: environment of the GMT command, e.g. to set GMT_TMPDIR
+    trace: list the trace record of the command is appended to, see command
+    caller: name of the calling area method recorded in the trace
     on success: this function returns the output of the GMT command
     """
 
-    # helper function for non-blocking I/O
-    def makeNonBlocking(fd):
-        fl = fcntl.fcntl(fd, fcntl.F_GETFL)
-        fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NDELAY)
+    return _run(command, arguments, grid.write, verbose, warn, stdout, env, trace, caller)
 
-    path_to_gmt = getGMTpath()
-    com = os.path.join(path_to_gmt, command) + ' ' + arguments
-    if verbose:
-        print com
-    # capture stdout and stderr from command
-    child = popen2.Popen3(com, True)         
-    infile = child.tochild
-    infd = infile.fileno()
-    outfile = child.fromchild 
-    outfd = outfile.fileno()
-    errfile = child.childerr
-    errfd = errfile.fileno()
-    # don't deadlock!
-    makeNonBlocking(outfd)            
-    makeNonBlocking(errfd)
-    outdata = StringIO()
-    errdata = StringIO()
-    outeof = erreof = 0
-    chunksize = 1000
-    i=0
-    written = False
-    while 1:
-        if infile.closed:
-            ready = select.select([outfd,errfd],[],[]) # wait for input
+def trace_report(trace, n=10):
+    """Summarise trace records.
+
+    trace: list of trace records, see command
+    n: number of the slowest commands listed
+    on return: report as a string"""
+
+    wall = sum([r['wall'] for r in trace])
+    cpu = sum([r['cpu'] for r in trace])
+    lines = ['%d GMT processes, %.3fs wall, %.3fs CPU'%(len(trace), wall, cpu)]
+
+    # totals per program
+    programs = {}
+    for r in trace:
+        (count,t) = programs.get(r['program'],(0,0.))
+        programs[r['program']] = (count+1,t+r['wall'])
+    lines.append('by program:')
+    for (t,p,count) in sorted([(t,p,count) for (p,(count,t)) in programs.items()], reverse=True):
+        lines.append('  %-14s %5d calls %9.3fs'%(p,count,t))
+
+    lines.append('slowest commands:')
+    for r in sorted(trace, key=lambda r: r['wall'], reverse=True)[:n]:
+        if r['bytes_in'] == None:
+            nin = '-'
         else:
-            ready = select.select([outfd,errfd],[infd],[]) # wait for input
-        if outfd in ready[0]:
-	    outchunk = outfile.read()
-	    if outchunk == '': outeof = 1
-	    outdata.write('%s'%outchunk)
-	if errfd in ready[0]:
-            error = True
-	    errchunk = errfile.read()
-	    if errchunk == '': erreof = 1
-	    errdata.write('%s'%errchunk)
-        if not infile.closed:
-            if infd in ready[1]:
-                if not written:
-                    grid.write(infile)
-                    written = True
-                else:
-                    infile.close()
-        if child.poll()>=0: break
-    err = child.wait()
-    if err != 0: 
-	raise RuntimeError, '%s failed w/ exit code %d\n%s' % (command, err, errdata.getvalue())
-    if len(errdata.getvalue()) > 0 and err == 0 and warn:
-        warnings.warn('%s\n%s' %(command, errdata.getvalue()), RuntimeWarning)
-    return outdata.getvalue()
+            nin = str(r['bytes_in'])
+        lines.append('  %9.3fs %-14s in %s out %d from %s'%(r['wall'],r['program'],nin,
+                                                          r['bytes_out'],r['caller']))
+    return '\n'.join(lines)
+
+
+def _defaults_key(env):
+    """Key of the gmtdefaults table used with environment env.
+
+    The table depends on the gmtdefaults binary and the .gmtdefaults files GMT
+    reads, so their modification times are part of the key."""
 
+    if env == None:
+        env = os.environ
+    prog = os.path.join(getGMTpath(),'gmtdefaults')
+    key = [prog, os.stat(prog).st_mtime]
+    for d in [env.get('GMT_TMPDIR',''), os.getcwd(), env.get('HOME','')]:
+        for f in ['.gmtdefaults4','.gmtdefaults']:
+            name = os.path.join(d,f)
+            if len(d) > 0 and os.path.exists(name):
+                key.append((name, os.stat(name).st_mtime))
+    return tuple(key)
+
+def _load_defaults(env):
+    """Return the parsed output of gmtdefaults -L, cached for each process."""
+
+    key = _defaults_key(env)
+    try:
+        return _defaults_table[key]
+    except KeyError:
+        pass
+    table = {}
+    for l in command('gmtdefaults','-L',env=env).split('\n'):
+        l = l.lstrip()
+        if len(l)>0 and l[0]!='#':
+            d = l.split('=')
+            table[d[0].strip()]=d[1].strip()
+    _defaults_table[key] = table
+    return table
 
 class Defaults(dict):
     """GMT defaults.
 
-    This dictionary contains the current GMT settings"""
+    This dictionary contains the current GMT settings. Changed settings are not
+    written with gmtset but passed to GMT commands as --KEY=value options, see
+    overrides, or written in one go with apply."""
 
-    def __init__(self,defaults=None):
+    def __init__(self,defaults=None,env=None,table=None,parent=None):
         """Initialise GMT default settings.
 
         Use default settings from dictionary defaults f the optional argument defaults is not None
-        otherwise get defaults from gmtdefaults"""
+        otherwise get defaults from gmtdefaults.
+        env: environment of gmtdefaults and gmtset, e.g. to set GMT_TMPDIR
+        table: settings GMT uses without overrides, defaults to the defaults
+        parent: Defaults whose later changes are also passed on by overrides"""
         #initialising directory for modifications
         dict.__init__(self)
+        self.env = env
+        self.parent = parent
         #and the directory for the defaults
 
         # loading defaults
         if defaults == None:
-            self.defaults = {}
-            self.__load_defaults()
+            self.table = _load_defaults(self.env)
+            self.defaults = self.table.copy()
         else:
             if isinstance(defaults,dict):
                 self.defaults = defaults
             else:
                 raise TypeError, 'Expected a dictionary'
+            if table == None:
+                self.table = defaults
+            else:
+                self.table = table
 
-    def __load_defaults(self):
-        defaults = command('gmtdefaults','-L')
-        for l in defaults.split('\n'):
-            l = l.lstrip()
-            if len(l)>0 and l[0]!='#':
-                d = l.split('=')
-                self.defaults[d[0].strip()]=d[1].strip()
-            
     def __setitem__(self,key,val):
         if self.defaults.has_key(key):
             dict.__setitem__(self,key,val)
-            command('gmtset','%s %s'%(key,val))
         else:
-            print self.defaults
             raise KeyError, key
 
     def __delitem__(self,key):
         if self.defaults.has_key(key):
             if self.has_key(key):
                 dict.__delitem__(self,key)
-                command('gmtset','%s %s'%(key,self.defaults[key]))
         else:
             raise KeyError, key
 
+    def overrides(self):
+        """D.overrides() -> return string of --KEY=value options for all settings differing from GMT's"""
+
+        options = []
+        settings = self.__settings()
+        for k in sorted(settings.keys()):
+            val = str(settings[k])
+            if val != self.table.get(k):
+                if ' ' in val:
+                    options.append('"--%s=%s"'%(k,val))
+                else:
+                    options.append('--%s=%s'%(k,val))
+        return ' '.join(options)
+
+    def __settings(self):
+        """Settings passed to GMT, changes of the parent apply unless set here."""
+
+        if self.parent != None:
+            settings = self.parent.__settings()
+        else:
+            settings = self.defaults.copy()
+        settings.update(self)
+        return settings
+
+    def apply(self):
+        """D.apply() -> write all settings differing from GMT's with a single gmtset"""
+
+        settings = self.__settings()
+        args = []
+        for k in sorted(settings.keys()):
+            val = str(settings[k])
+            if val != self.table.get(k):
+                args.append('%s "%s"'%(k,val))
+        if len(args) > 0:
+            command('gmtset',' '.join(args),env=self.env)
+
     def Reset(self):
         """D.Reset() -> reset GMT settings to defaults"""
 
@@ -224,10 +515,7 @@ class Defaults(dict):
         
     def GetCurrentItem(self,key):
         """D.GetCurrentItem(key) -> return the current GMT setting for key"""
-        try:
-            return self.__getitem__(key)
-        except KeyError:
-            return self.defaults[key]
+        return self.__settings()[key]
 
     def GetCurrentKeys(self):
         """D.GetCurrentKeys() -> return list of keys"""
@@ -236,8 +524,5 @@ class Defaults(dict):
     def GetCurrentSettings(self):
         """D.GetCurrentSettings() -> return a directory containing all current GMT settings"""
 
-        settings = self.defaults.copy()
-        for k in self:
-            settings[k] = self.GetCurrentItem(k)
-        return settings
+        return self.__settings()
             
@@ -18,20 +18,41 @@
 
 """Class for handling GMT grids."""
 
-__all__=['Grid','read_grid','triangulate']
+__all__=['Grid','read_grid','read_grid_header','map_grid','triangulate']
 
-import numpy,gmtio,os,tempfile
+import numpy,gmtio,os,tempfile,math,hashlib,threading
+from collections import OrderedDict
 from PyGMTcommand import command
+from PyGMTtable import *
+from PyGMTcache import grid_cache, result_cache
 from StringIO import StringIO
 
+# header of GMT native binary grids
+_native_header = numpy.dtype([('nx','i4'),('ny','i4'),('node_offset','i4'),
+                              ('x_min','f8'),('x_max','f8'),('y_min','f8'),('y_max','f8'),
+                              ('z_min','f8'),('z_max','f8'),('x_inc','f8'),('y_inc','f8'),
+                              ('z_scale_factor','f8'),('z_add_offset','f8'),
+                              ('x_units','S80'),('y_units','S80'),('z_units','S80'),
+                              ('title','S80'),('command','S320'),('remark','S160')])
+
+# grid headers read from files, keyed on file name, size and modification time,
+# least recently used headers are dropped once there are more than _HEADER_CACHE_SIZE
+_HEADER_CACHE_SIZE = 256
+_header_cache = OrderedDict()
+_header_lock = threading.Lock()
+
 class Grid(object):
     """GMT grid.
 
     This class discribes GMT grids. The data is stored as a numpy Python
     array. """
 
-    def __init__(self):
-        """Initialise  grid structure"""
+    def __init__(self,dtype=None):
+        """Initialise  grid structure
+
+        dtype: if set, data is stored with this type, e.g. 'f' to keep
+               grids in single precision"""
+        self.dtype = dtype
         self.__x_minmax = numpy.zeros(2,dtype='f')
         self.__y_minmax = numpy.zeros(2,dtype='f')
         self.__node_offset = 0
@@ -44,6 +65,11 @@ class Grid(object):
         self.command = ''
         self.remark = ''
         self.__data = None
+        # function returning the data array when it is first accessed
+        self._loader = None
+        # shape and z range from the header of grids without data
+        self._shape = None
+        self._z_minmax = None
 
     # Minimum and maximum x values
     def __set_x_minmax(self,val):
@@ -88,30 +114,83 @@ class Grid(object):
 
     # z scale
     def __set_z_scale(self,val):
-        __z_scale = float(val)
+        self.__z_scale = float(val)
     def __get_z_scale(self):
         return self.__z_scale
     z_scale = property(__get_z_scale,__set_z_scale)    
 
     # data
     def __set_data(self,val):
-        if type(val) is not numpy.ndarray:
+        if not isinstance(val,numpy.ndarray):
             raise ValueError, 'Expected a numpy array'
         if len(val.shape) != 2:
             raise ValueError, 'Expected a numpy array with two dimensions'
+        if self.dtype != None and val.dtype != numpy.dtype(self.dtype):
+            val = val.astype(self.dtype)
         self.__data = val
+        self._loader = None
+        self._shape = None
+        self._z_minmax = None
     def __get_data(self):
+        if self.__data is None and self._loader != None:
+            self.data = self._loader()
         return self.__data
     data = property(__get_data,__set_data)    
 
+    # number of nodes in x and y direction, does not load data
+    def __get_shape(self):
+        if self.__data is None:
+            return self._shape
+        return self.__data.shape
+    shape = property(__get_shape)
+
+    # minimum and maximum z values, taken from the header until data is loaded
+    def __get_z_minmax(self):
+        if self.__data is None:
+            return self._z_minmax
+        return numpy.array([numpy.nanmin(self.__data),numpy.nanmax(self.__data)])
+    z_minmax = property(__get_z_minmax)
+
+    # node spacing in x and y direction
+    def __get_increment(self):
+        if self.shape == None:
+            return None
+        n = numpy.array(self.shape,dtype=numpy.float64) - 1 + self.__node_offset
+        return numpy.array([(self.__x_minmax[1]-self.__x_minmax[0])/n[0],
+                            (self.__y_minmax[1]-self.__y_minmax[0])/n[1]])
+    increment = property(__get_increment)
+
     def __check_grid(self):
-        if self.__data == None:
+        if self.data is None:
             raise AssertionError, 'Data array is not set yet'
         if self.__x_minmax[0] == self.__x_minmax[1]:
             raise AssertionError, 'X min/max is not set yet'
         if self.__y_minmax[0] == self.__y_minmax[1]:
             raise AssertionError, 'Y min/max is not set yet'
     
+    def fingerprint(self):
+        """Return a digest of the grid header and data.
+
+        Grids with the same fingerprint are written to identical files."""
+
+        data = self.data
+        digest = hashlib.sha1(repr((self.__x_minmax.tolist(),self.__y_minmax.tolist(),self.__node_offset,
+                                    self.z_scale,self.z_offset,self.xunits,self.yunits,self.zunits,
+                                    self.title,self.remark,data.shape,data.dtype.str)))
+        if data.flags.c_contiguous:
+            digest.update('C')
+            digest.update(data)
+        elif data.flags.f_contiguous:
+            digest.update('F')
+            digest.update(data.T)
+        else:
+            # hash views in chunks of about a million nodes
+            digest.update('C')
+            step = max(1,(1<<20)/max(data.shape[1],1))
+            for i in range(0,data.shape[0],step):
+                digest.update(numpy.ascontiguousarray(data[i:i+step]))
+        return digest.hexdigest()
+
     def write(self,file):
         """Write grid to GMT binary file.
 
@@ -119,27 +198,131 @@ class Grid(object):
 
         self.__check_grid()
 
-        gmtio.write(file,self.__x_minmax,self.__y_minmax,self.__node_offset,self.z_scale,self.z_offset,self.xunits,self.yunits,self.zunits,self.title,self.remark,self.__data)
+        gmtio.write(file,self.__x_minmax,self.__y_minmax,self.__node_offset,self.z_scale,self.z_offset,self.xunits,self.yunits,self.zunits,self.title,self.remark,self.data)
+
+    def sample(self,x,y,method='bilinear'):
+        """Sample grid at points.
+
+        x: x coordinates of points
+        y: y coordinates of points
+        method: interpolation method, 'nearest', 'bilinear' or 'bicubic'
+
+        returns an array of grid values scaled by z_scale and z_offset like
+        GMT does, points outside the grid are NaN
+        """
+
+        x = numpy.asarray(x,dtype=numpy.float64)
+        y = numpy.asarray(y,dtype=numpy.float64)
+        if x.shape != y.shape:
+            raise ValueError, 'Expecting same length of arrays'
+        data = self.data
+        (nx,ny) = data.shape
+        (dx,dy) = self.increment
+        xmin = float(self.__x_minmax[0])
+        ymin = float(self.__y_minmax[0])
+
+        inside = (x>=xmin) & (x<=self.__x_minmax[1]) & (y>=ymin) & (y<=self.__y_minmax[1])
+        # fractional node indices, points between the outermost nodes of
+        # pixel grids and the grid boundary get the boundary value
+        offset = 0.5*self.__node_offset
+        fx = numpy.clip(numpy.where(inside,(x-xmin)/dx-offset,0.),0,nx-1)
+        fy = numpy.clip(numpy.where(inside,(y-ymin)/dy-offset,0.),0,ny-1)
+
+        if method == 'nearest':
+            z = data[numpy.rint(fx).astype(int),numpy.rint(fy).astype(int)].astype(numpy.float64)
+        elif method == 'bilinear':
+            z = _interpolate(data,fx,fy,_linear_weights)
+        elif method == 'bicubic':
+            z = _interpolate(data,fx,fy,_cubic_weights)
+        else:
+            raise ValueError, 'Unknown interpolation method: %s'%method
+        if self.z_scale != 1. or self.z_offset != 0.:
+            z = z*self.z_scale + self.z_offset
+        z[~inside] = numpy.nan
+        return z
+
+    def sample_tracks(self,tracks,method='bilinear'):
+        """Sample grid along many tracks in one go.
+
+        tracks: list of (x,y) tuples containing coordinates of each track
+        method: interpolation method, see sample
+
+        returns a list containing an array of grid values for each track
+        """
+
+        if len(tracks) == 0:
+            return []
+        x = numpy.concatenate([numpy.asarray(t[0],dtype=numpy.float64) for t in tracks])
+        y = numpy.concatenate([numpy.asarray(t[1],dtype=numpy.float64) for t in tracks])
+        z = self.sample(x,y,method=method)
+        bounds = numpy.cumsum([len(t[0]) for t in tracks])[:-1]
+        return numpy.split(z,bounds)
 
-    def grdtrack(self,trackx,tracky):
+    def grdtrack(self,trackx,tracky,binary=False,method='gmt'):
         """Sample grid along a track specified as xy pairs.
 
         trackx: x coordinates of transect
         tracky: y coordinates of transect        
+        binary: if True, exchange data with grdtrack as binary tables and
+                return an array, otherwise a list is returned
+        method: 'gmt' to sample the grid with the grdtrack program, or one of
+                the interpolation methods of sample, 'nearest', 'bilinear'
+                or 'bicubic', to sample it with numpy without running GMT.
+                Results of numpy sampling differ slightly from grdtrack near
+                the grid boundary and at NaN nodes.
         """
 
-        #write grid to a temporary file
-        grdfile = tempfile.NamedTemporaryFile(suffix='.grd')
-        grdname  = grdfile.name
-        self.write(grdfile.file)
-        grdfile.flush()
+        if method != 'gmt':
+            profile = self.sample(trackx,tracky,method=method)
+            if not binary:
+                profile = profile.tolist()
+            return profile
+
+        # the cache file name depends on the process, the key on the grid only
+        if result_cache.enabled:
+            fingerprint = self.fingerprint()
+            keyarg = '-G%s -Q '%fingerprint
+        else:
+            fingerprint = None
+            keyarg = None
+
+        def run(program,arguments,indata=''):
+            # the grid is only written if the result is not cached
+            grdname = grid_cache.path(self,pin=True,fingerprint=fingerprint)
+            try:
+                return command(program,'-G%s=bf %s'%(grdname,arguments),indata=indata)
+            finally:
+                grid_cache.unpin(grdname)
+
+        arg = '-Q '
+
+        if binary:
+            x = numpy.asarray(trackx,dtype=numpy.float64)
+            y = numpy.asarray(tracky,dtype=numpy.float64)
+            arg = '%s %s %s'%(arg,binary_input(2),binary_output())
+            if keyarg != None:
+                keyarg = '%s %s %s'%(keyarg,binary_input(2),binary_output())
+            xyz = unpack_table(result_cache.call(run,'grdtrack',arg,indata=pack_table([x,y]),keyargs=keyarg),3)
+            profile = numpy.empty(len(x),dtype=numpy.float64)
+            profile[:] = numpy.nan
+            # grdtrack drops points outside the grid, coordinates are
+            # passed through unchanged so they can be matched exactly
+            inside = (x>=self.x_minmax[0]) & (x<=self.x_minmax[1]) & (y>=self.y_minmax[0]) & (y<=self.y_minmax[1])
+            if inside.sum() == len(xyz) and numpy.all(x[inside]==xyz[:,0]) and numpy.all(y[inside]==xyz[:,1]):
+                profile[inside] = xyz[:,2]
+            else:
+                j = 0
+                for i in range(0,len(x)):
+                    if j<len(xyz) and x[i]==xyz[j,0] and y[i]==xyz[j,1]:
+                        profile[i] = xyz[j,2]
+                        j = j + 1
+            return profile
 
         xydata = StringIO()
         for i in range(0,len(trackx)):
             xydata.write('%f %f\n'%(trackx[i],tracky[i]))
 
-        arg = '-G%s=bf -Q '%grdname
-        zdata = command('grdtrack',arg,indata=xydata.getvalue())
+        zdata = result_cache.call(run,'grdtrack',arg,indata=xydata.getvalue(),keyargs=keyarg)
         profile = []
         i = 0
         lines = zdata.split('\n')
@@ -157,8 +340,6 @@ class Grid(object):
             profile.append(float(z[2]))
             j = j + 1
             
-        # cleaning up
-        grdfile.close()
         return profile
 
     def project(self,args):
@@ -167,22 +348,59 @@ class Grid(object):
         args: GMT grdproject args."""
 
 
-        ingrdfile = tempfile.NamedTemporaryFile(suffix='-in.grd')
-        ingrdname  = ingrdfile.name
-        self.write(ingrdfile.file)
-        ingrdfile.flush()
+        ingrdname = grid_cache.path(self,pin=True)
 
         outgrdfile = tempfile.NamedTemporaryFile(suffix='-out.grd')
         outgrdname  = outgrdfile.name
         
-        command('grdproject','%s=bf -G%s=bf %s'%(ingrdname,outgrdname,args))
+        try:
+            command('grdproject','%s=bf -G%s=bf %s'%(ingrdname,outgrdname,args))
+        finally:
+            grid_cache.unpin(ingrdname)
 
         prj = read_grid(outgrdfile.file)
 
-        ingrdfile.close()
         outgrdfile.close()
         return prj
         
+    def contours(self,level):
+        """Extract contour polygons of the grid.
+
+        level: contour level, compared with the grid values scaled by z_scale and z_offset
+
+        returns a list of (x,y) tuples of arrays, one for each polygon.
+        Polygons are closed, i.e. the first point is repeated at the end, and
+        enclose the parts of the grid above level. Contours are closed along
+        the boundary of the grid, NaN nodes are treated as being just below level."""
+
+        self.__check_grid()
+        level = float(level)
+        (nx,ny) = self.shape
+        (dx,dy) = self.increment
+        offset = 0.5*self.__node_offset
+
+        # surround a copy of the data with nodes just below level on the grid
+        # boundary, so that all contours are closed along the boundary
+        below = numpy.nextafter(level,-numpy.inf)
+        z = numpy.empty((nx+2,ny+2),dtype=numpy.float64)
+        z[:,:] = below
+        z[1:-1,1:-1] = self.data
+        # GMT contours the scaled values
+        if self.z_scale != 1. or self.z_offset != 0.:
+            z[1:-1,1:-1] *= self.z_scale
+            z[1:-1,1:-1] += self.z_offset
+        z[numpy.isnan(z)] = below
+        x = numpy.empty(nx+2,dtype=numpy.float64)
+        x[1:-1] = self.__x_minmax[0]+(numpy.arange(nx)+offset)*dx
+        x[0] = self.__x_minmax[0]
+        x[-1] = self.__x_minmax[1]
+        y = numpy.empty(ny+2,dtype=numpy.float64)
+        y[1:-1] = self.__y_minmax[0]+(numpy.arange(ny)+offset)*dy
+        y[0] = self.__y_minmax[0]
+        y[-1] = self.__y_minmax[1]
+
+        return _marching_squares(z,x,y,level)
+
     def gridinfo(self):
         """Print grid info."""
         print 'x_minmax    :',self.__x_minmax
@@ -196,9 +414,9 @@ class Grid(object):
         print 'title       :',self.title
         print 'command     :',self.command
         print 'remark      :',self.remark
-        print 'size        :',self.__data.shape
+        print 'size        :',self.shape
 
-def read_grid(file):
+def read_grid(file,dtype='d',region=None,stride=1):
     """Read GMT grid from file handle or filename string
     
      * If file is a file object (return by open), then file is assumed to be
@@ -206,15 +424,344 @@ def read_grid(file):
 
      * If file is a string, that filename is read by libgmt and can be any
        valid grid file that GMT can read.
+
+     dtype: type of the data array, either 'd' or 'f'. GMT grids are stored
+       as floats so 'f' halves the memory used without loss of precision.
+     region: if set, only read the nodes covering [xmin,xmax,ymin,ymax]
+     stride: only read every stride-th node in each direction
+
+     The window is rounded outwards to grid nodes, so the grid read covers
+     the whole region. It starts at the last node at or below the region
+     minimum and ends at the first stride-th node at or above the region
+     maximum (clipped to the grid). x_minmax and y_minmax of the returned
+     grid describe the nodes actually read.
      """
 
     # new grid
-    grid = Grid()
-    (grid.x_minmax,grid.y_minmax,grid.node_offset,grid.z_scale,grid.z_offset,grid.xunits,grid.yunits,grid.zunits,grid.title,grid.remark,grid.data) = gmtio.read(file)
+    grid = Grid(dtype=dtype)
+
+    if (region == None and stride == 1) or isinstance(file,str):
+        if region == None:
+            result = gmtio.read(file,dtype)
+        else:
+            # libgmt reads the subregion, which must lie within the grid
+            header = read_grid_header(file)
+            result = gmtio.read(file,dtype,
+                                max(region[0],header.x_minmax[0]),min(region[1],header.x_minmax[1]),
+                                max(region[2],header.y_minmax[0]),min(region[3],header.y_minmax[1]))
+        (grid.x_minmax,grid.y_minmax,grid.node_offset,grid.z_scale,grid.z_offset,grid.xunits,grid.yunits,grid.zunits,grid.title,grid.remark,grid.data) = result
+        if stride != 1:
+            (i0,ni,j0,nj,grid.x_minmax,grid.y_minmax) = _window(grid,None,stride)
+            grid.data = grid.data[i0:i0+(ni-1)*stride+1:stride,j0:j0+(nj-1)*stride+1:stride].copy()
+        return grid
+
+    # only read the rows and columns needed from native binary grids
+    header = _read_native_header(file)
+    _set_header(grid,header)
+    (nx,ny) = grid.shape
+    (i0,ni,j0,nj,x_minmax,y_minmax) = _window(grid,region,stride)
+    rows = numpy.empty((nj,ni),dtype=numpy.float32)
+    rowlen = (ni-1)*stride+1
+    try:
+        start = file.tell()
+        for k in range(0,nj):
+            # GMT stores rows from the top
+            r = ny-1-(j0+k*stride)
+            file.seek(start + 4*(r*nx+i0))
+            rows[k] = numpy.frombuffer(file.read(4*rowlen),dtype=numpy.float32)[::stride]
+        file.seek(start + 4*nx*ny)
+    except IOError:
+        # cannot seek in pipes
+        nodes = numpy.frombuffer(file.read(4*nx*ny),dtype=numpy.float32).reshape(ny,nx)[::-1]
+        rows[:,:] = nodes[j0:j0+(nj-1)*stride+1:stride,i0:i0+rowlen:stride]
+    grid.x_minmax = x_minmax
+    grid.y_minmax = y_minmax
+    grid.data = rows.T
+
+    return grid
+
+def read_grid_header(file,dtype='d'):
+    """Read the header of a GMT grid from file handle or filename string.
+
+    file: see read_grid
+    dtype: type of the data array, see read_grid
+
+    Returns a grid without data, its extent, shape, increment, node offset
+    and z range are taken from the header. Headers read from file names
+    are cached and the data is read when it is first accessed."""
+
+    if isinstance(file,str):
+        try:
+            st = os.stat(file)
+            key = (os.path.abspath(file),st.st_size,st.st_mtime)
+        except OSError:
+            # not a plain file name, e.g. a netCDF variable
+            key = None
+        header = None
+        if key != None:
+            _header_lock.acquire()
+            try:
+                if key in _header_cache:
+                    header = _header_cache.pop(key)
+                    _header_cache[key] = header
+            finally:
+                _header_lock.release()
+        if header == None:
+            header = gmtio.read_header(file)
+            if key != None:
+                _header_lock.acquire()
+                try:
+                    _header_cache[key] = header
+                    while len(_header_cache) > _HEADER_CACHE_SIZE:
+                        _header_cache.popitem(last=False)
+                finally:
+                    _header_lock.release()
+    else:
+        header = gmtio.read_header(file)
+
+    grid = Grid(dtype=dtype)
+    _set_header(grid,header)
+    if isinstance(file,str):
+        grid._loader = lambda: gmtio.read(file,dtype)[-1]
+    return grid
+
+def _linear_weights(f,n):
+    """Node indices and weights for linear interpolation.
+
+    f: fractional node indices
+    n: number of nodes"""
+
+    i = numpy.clip(numpy.floor(f).astype(int),0,max(n-2,0))
+    t = f-i
+    return ([i,i+1],[1.-t,t])
+
+def _cubic_weights(f,n):
+    """Node indices and weights for cubic convolution.
+
+    f: fractional node indices
+    n: number of nodes"""
+
+    i = numpy.clip(numpy.floor(f).astype(int),0,n-1)
+    t = f-i
+    return ([i-1,i,i+1,i+2],
+            [((-0.5*t+1.)*t-0.5)*t,
+             (1.5*t-2.5)*t*t+1.,
+             ((-1.5*t+2.)*t+0.5)*t,
+             (0.5*t-0.5)*t*t])
+
+def _interpolate(data,fx,fy,weights):
+    """Interpolate 2D array at fractional node indices.
+
+    data: array to be interpolated
+    fx, fy: fractional node indices
+    weights: function returning node indices and weights"""
+
+    (nx,ny) = data.shape
+    (iidx,iw) = weights(fx,nx)
+    (jidx,jw) = weights(fy,ny)
+    z = numpy.zeros(fx.shape,dtype=numpy.float64)
+    for k in range(0,len(iidx)):
+        i = numpy.clip(iidx[k],0,nx-1)
+        # neighbour of boundary nodes used for extrapolation
+        ii = numpy.clip(numpy.where(iidx[k]<0,1,numpy.where(iidx[k]>nx-1,nx-2,i)),0,nx-1)
+        for l in range(0,len(jidx)):
+            j = numpy.clip(jidx[l],0,ny-1)
+            jj = numpy.clip(numpy.where(jidx[l]<0,1,numpy.where(jidx[l]>ny-1,ny-2,j)),0,ny-1)
+            v = data[i,j].astype(numpy.float64)
+            # nodes outside the grid are extrapolated linearly
+            if numpy.any(ii!=i) or numpy.any(jj!=j):
+                v = 3*v - data[ii,j] - data[i,jj]
+            w = iw[k]*jw[l]
+            # NaN nodes only matter if they contribute
+            z = z + numpy.where(w!=0.,w*v,0.)
+    return z
+
+# contour segments of marching squares cells, indexed on the cell case.
+# Cell edges are numbered counter-clockwise starting with the bottom edge,
+# segments run from edge to edge with the nodes above level on their left.
+# The saddle cases 5 and 10 have an entry for the cell centre being below
+# and one for it being above level.
+_CELL_SEGMENTS = {1:[(0,3)], 2:[(1,0)], 3:[(1,3)], 4:[(2,1)],
+                  5:([(0,3),(2,1)],[(0,1),(2,3)]), 6:[(2,0)], 7:[(2,3)],
+                  8:[(3,2)], 9:[(0,2)],
+                  10:([(1,0),(3,2)],[(3,0),(1,2)]), 11:[(1,2)],
+                  12:[(3,1)], 13:[(0,1)], 14:[(3,0)]}
+
+def _marching_squares(z,x,y,level):
+    """Trace closed contours of a 2D array.
+
+    z: 2D array whose boundary nodes are all below level
+    x, y: node coordinates
+    level: contour level
+
+    returns a list of (x,y) tuples of arrays"""
+
+    (nx,ny) = z.shape
+    above = z>level
+
+    # crossings of the horizontal edges, (i,j)-(i+1,j), followed by
+    # the vertical edges, (i,j)-(i,j+1)
+    nh = (nx-1)*ny
+    with numpy.errstate(divide='ignore',invalid='ignore'):
+        t = (level-z[:-1,:])/(z[1:,:]-z[:-1,:])
+        px = numpy.concatenate(((x[:-1,None]+t*(x[1:]-x[:-1])[:,None]).ravel(),
+                                numpy.repeat(x,ny-1)))
+        py = numpy.concatenate((numpy.tile(y,nx-1),
+                                numpy.zeros(nx*(ny-1))))
+        t = (level-z[:,:-1])/(z[:,1:]-z[:,:-1])
+        py[nh:] = (y[None,:-1]+t*(y[1:]-y[:-1])[None,:]).ravel()
+
+    # classify cells
+    case = (above[:-1,:-1].astype(numpy.int8) + 2*above[1:,:-1] +
+            4*above[1:,1:] + 8*above[:-1,1:])
+    centre = 0.25*(z[:-1,:-1]+z[1:,:-1]+z[1:,1:]+z[:-1,1:]) > level
+
+    start = []
+    end = []
+    for (c,segs) in _CELL_SEGMENTS.items():
+        if isinstance(segs,tuple):
+            cells = [(case==c) & ~centre, (case==c) & centre]
+        else:
+            cells = [case==c]
+            segs = (segs,)
+        for k in range(0,len(cells)):
+            (i,j) = numpy.nonzero(cells[k])
+            if len(i) == 0:
+                continue
+            # global ids of the cell edges
+            edges = (i*ny+j, nh+(i+1)*(ny-1)+j, i*ny+j+1, nh+i*(ny-1)+j)
+            for (s,e) in segs[k]:
+                start.append(edges[s])
+                end.append(edges[e])
+    if len(start) == 0:
+        return []
+    start = numpy.concatenate(start)
+    end = numpy.concatenate(end)
+
+    # each crossing starts exactly one segment, link segments into polygons
+    order = numpy.argsort(start)
+    following = order[numpy.searchsorted(start[order],end)].tolist()
+    visited = [False]*len(following)
+    polygons = []
+    for first in range(0,len(following)):
+        if visited[first]:
+            continue
+        ring = []
+        s = first
+        while not visited[s]:
+            visited[s] = True
+            ring.append(s)
+            s = following[s]
+        idx = start[ring+[first]]
+        polygons.append((px[idx],py[idx]))
+    return polygons
+
+def _window(grid,region,stride):
+    """Find the nodes of a grid covering a region.
+
+    grid: grid, only the header is used
+    region: [xmin,xmax,ymin,ymax] or None for the whole grid
+    stride: use every stride-th node
+
+    returns a tuple (i0,ni,j0,nj,x_minmax,y_minmax) so that the ni x nj nodes
+    starting at i0,j0 and stepping by stride cover the region. The window is
+    rounded outwards, it may extend beyond the region by up to one node
+    spacing at the minimum and up to stride node spacings at the maximum."""
+
+    if stride < 1:
+        raise ValueError, 'Stride must be at least 1'
+    if region == None:
+        region = [grid.x_minmax[0],grid.x_minmax[1],grid.y_minmax[0],grid.y_minmax[1]]
+    offset = 0.5*grid.node_offset
+    minmax = []
+    for (vmin,d,n,lo,hi) in [(grid.x_minmax[0],grid.increment[0],grid.shape[0],region[0],region[1]),
+                             (grid.y_minmax[0],grid.increment[1],grid.shape[1],region[2],region[3])]:
+        if lo > hi:
+            raise ValueError, 'minimum value must be smaller than maximum: %f, %f'%(lo,hi)
+        # allow for rounding errors
+        eps = 1.e-6
+        first = max(int(math.floor((lo-vmin)/d + eps)),0)
+        last = min(int(math.ceil((hi-vmin)/d - eps)) - grid.node_offset,n-1)
+        if first > last:
+            raise ValueError, 'Region does not overlap grid'
+        count = (last-first+stride-1)/stride + 1
+        if first + (count-1)*stride > n-1:
+            count = count - 1
+        # grid registered grids need at least two nodes
+        if count < 2 and grid.node_offset == 0:
+            if first + stride <= n-1:
+                count = 2
+            elif first - stride >= 0:
+                first = first - stride
+                count = 2
+            else:
+                raise ValueError, 'Region too small for stride'
+        minmax.append((first,count,
+                       [vmin + (first+offset-offset*stride)*d,
+                        vmin + (first+(count-1)*stride+offset+offset*stride)*d]))
+    return (minmax[0][0],minmax[0][1],minmax[1][0],minmax[1][1],minmax[0][2],minmax[1][2])
+
+def _read_native_header(file):
+    """Read the header of a GMT native binary grid from an open file."""
+
+    data = file.read(_native_header.itemsize)
+    if len(data) != _native_header.itemsize:
+        raise IOError, 'Error, reading GMT header from file'
+    return numpy.frombuffer(data,dtype=_native_header)[0]
+
+def _set_header(grid,header):
+    """Copy GMT native header to grid."""
+
+    grid.x_minmax = [header['x_min'],header['x_max']]
+    grid.y_minmax = [header['y_min'],header['y_max']]
+    grid.node_offset = int(header['node_offset'])
+    grid.z_scale = header['z_scale_factor']
+    grid.z_offset = header['z_add_offset']
+    grid.xunits = header['x_units']
+    grid.yunits = header['y_units']
+    grid.zunits = header['z_units']
+    grid.title = header['title']
+    grid.command = header['command']
+    grid.remark = header['remark']
+    grid._shape = (int(header['nx']),int(header['ny']))
+    grid._z_minmax = numpy.array([header['z_min'],header['z_max']])
+
+def map_grid(filename,region=None,stride=1):
+    """Memory map GMT native binary grid (=bf).
+
+    filename: name of grid file
+    region: if set, only map the nodes covering [xmin,xmax,ymin,ymax]
+    stride: only use every stride-th node in each direction
+
+    Only the header is read. The data array is a copy-on-write view of the
+    file which is mapped when the data is first accessed; nodes are read
+    from disk as they are used."""
+
+    grdfile = open(filename,'rb')
+    header = _read_native_header(grdfile)
+    grdfile.close()
 
+    nx = int(header['nx'])
+    ny = int(header['ny'])
+    if os.path.getsize(filename) != _native_header.itemsize + 4*nx*ny:
+        raise IOError, '%s is not a GMT native binary grid'%filename
+
+    grid = Grid(dtype='f')
+    _set_header(grid,header)
+    if region != None or stride != 1:
+        (i0,ni,j0,nj,grid.x_minmax,grid.y_minmax) = _window(grid,region,stride)
+        grid._shape = (ni,nj)
+    else:
+        (i0,ni,j0,nj) = (0,nx,0,ny)
+    def loader():
+        nodes = numpy.memmap(filename,dtype=numpy.float32,mode='c',
+                             offset=_native_header.itemsize,shape=(ny,nx))
+        # GMT stores rows from the top
+        return nodes[::-1][j0:j0+(nj-1)*stride+1:stride,i0:i0+(ni-1)*stride+1:stride].T
+    grid._loader = loader
     return grid
 
-def triangulate(x,y,z,xinc,yinc):
+def triangulate(x,y,z,xinc,yinc,binary=False):
     """Triangulate (x,y,z) points and return a GMT grid.
 
     x: list/array containing x values
@@ -222,29 +769,33 @@ def triangulate(x,y,z,xinc,yinc):
     z: list/array containing z values
     xinc: spacing in x direction
     yinc: spacing in y direction
+    binary: if True, pass points to GMT as a binary table
     """
 
     if len(x)!=len(y) or len(x)!=len(z):
         raise ValueError, 'Expecting same length of arrays'
 
-    xyzdata = StringIO()
-    for i in range(0,len(x)):
-        xyzdata.write('%f %f %f\n'%(x[i],y[i],z[i]))
-
-    region=command('minmax','-I%f/%f'%(xinc,yinc),indata=xyzdata.getvalue())
-
-    grdname = '.grid'
-    arg = '-G%s=bf -I%f/%f %s '%(grdname,
-                                xinc,yinc,
-                                region)
-    command('triangulate',arg,indata=xyzdata.getvalue())
-
-
-
-    grdfile = file(grdname)
-    grid = read_grid(grdfile)
-    grdfile.close()
+    if binary:
+        xyzdata = pack_table([x,y,z])
+        binarg = binary_input(3)
+    else:
+        xyzstring = StringIO()
+        for i in range(0,len(x)):
+            xyzstring.write('%f %f %f\n'%(x[i],y[i],z[i]))
+        xyzdata = xyzstring.getvalue()
+        binarg = ''
+
+    region=result_cache.call(command,'minmax','-I%f/%f %s'%(xinc,yinc,binarg),indata=xyzdata)
+
+    grdfile = tempfile.NamedTemporaryFile(suffix='.grd')
+    grdname = grdfile.name
+    arg = '-G%s=bf -I%f/%f %s %s'%(grdname,
+                                   xinc,yinc,
+                                   region.strip(),binarg)
+    command('triangulate',arg,indata=xyzdata)
+
+    grid = read_grid(grdfile.file)
     # cleaning up
-    os.remove(grdname)
+    grdfile.close()
 
     return grid
@@ -31,6 +31,9 @@ class KeyArea(AreaXY):
         parent: can be either a Canvas or another Area.
         pos: position of area relative to the parent
         size: size of GMT area
+
+        Set K.buffer_text = True to plot all entry names with a single pstext
+        call, they are then plotted by K.flushtext() or when the canvas is closed.
         """
 
         AreaXY.__init__(self,parent,pos=pos,size=size)
@@ -0,0 +1,366 @@
+# Copyright 2004, Magnus Hagdorn
+#
+# This file is part of PyGMT.
+#
+# PyGMT is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# PyGMT is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyGMT; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""Map projections computed with numpy.
+
+The projections produce the same plot coordinates as mapproject for the
+GMT projections B (Albers), L (Lambert conic), S (stereographic),
+M (Mercator) and X (linear). Formulae are the ellipsoidal ones from
+Snyder, Map Projections - A Working Manual, USGS PP 1395.
+
+Areas use these projections instead of running mapproject. Set
+PyGMT.PyGMTproject.enabled = False to always use mapproject."""
+
+__all__=['Projection','get_projection']
+
+import numpy
+
+# if False, get_projection refuses all projections so that mapproject is used
+enabled = True
+
+# squared eccentricity of the ellipsoids GMT knows by default
+ELLIPSOIDS = {'WGS-84' : 0.00669437999014,
+              'GRS-80' : 0.00669438002290,
+              'Sphere' : 0.}
+
+# size of GMT measure units in inch
+UNITS = {'c' : 1./2.54,
+         'i' : 1.,
+         'm' : 100./2.54,
+         'p' : 1./72.}
+MEASURE_UNITS = {'cm' : 'c',
+                 'inch' : 'i',
+                 'm' : 'm',
+                 'point' : 'p'}
+
+# number of points per side used to find the extent of non-rectangular regions
+_NBOUNDARY = 181
+# iterations for inverting latitude functions
+_NITER = 15
+
+# parsed projections, see get_projection
+_projections = {}
+
+def _size(value,unit):
+    """Convert GMT size with optional unit suffix to unit."""
+
+    if value[-1] in UNITS:
+        return float(value[:-1])*UNITS[value[-1]]/UNITS[unit]
+    return float(value)
+
+def _conformal(phi,e):
+    """Conformal latitude."""
+
+    es = e*numpy.sin(phi)
+    return 2.*numpy.arctan(numpy.tan(numpy.pi/4.+phi/2.)*((1.-es)/(1.+es))**(e/2.))-numpy.pi/2.
+
+def _geodetic(chi,e):
+    """Latitude from conformal latitude."""
+
+    phi = chi
+    t = numpy.tan(numpy.pi/4.+chi/2.)
+    for i in range(_NITER):
+        es = e*numpy.sin(phi)
+        phi = 2.*numpy.arctan(t*((1.+es)/(1.-es))**(e/2.))-numpy.pi/2.
+    return phi
+
+def _m(phi,e):
+    return numpy.cos(phi)/numpy.sqrt(1.-(e*numpy.sin(phi))**2)
+
+def _q(phi,e):
+    s = numpy.sin(phi)
+    if e == 0.:
+        return 2.*s
+    return (1.-e*e)*(s/(1.-(e*s)**2)-numpy.log((1.-e*s)/(1.+e*s))/(2.*e))
+
+def _t(phi,e):
+    es = e*numpy.sin(phi)
+    return numpy.tan(numpy.pi/4.-phi/2.)/((1.-es)/(1.+es))**(e/2.)
+
+def _wrap(dlon):
+    """Wrap longitude differences to [-pi,pi)."""
+
+    return numpy.remainder(dlon+numpy.pi,2.*numpy.pi)-numpy.pi
+
+class Projection(object):
+    """A GMT projection of a region onto the plot.
+
+    forward and inverse convert between geographic and plot coordinates. If a
+    GMT projection is not supported NotImplementedError is raised on creation."""
+
+    def __init__(self,projection,region,unit='cm',ellipsoid='WGS-84'):
+        """Initialise projection.
+
+        projection: GMT projection string, e.g. B33.5/60.5/52.8/68.2/10
+        region: GMT region string, w/e/s/n or w/s/e/nr
+        unit: GMT MEASURE_UNIT
+        ellipsoid: GMT ELLIPSOID"""
+
+        if unit not in MEASURE_UNITS or ellipsoid not in ELLIPSOIDS:
+            raise NotImplementedError, 'unit %s or ellipsoid %s'%(unit,ellipsoid)
+        self.unit = MEASURE_UNITS[unit]
+        self.e = numpy.sqrt(ELLIPSOIDS[ellipsoid])
+
+        # parsing region
+        rectangular = region.endswith('r')
+        try:
+            r = [float(v) for v in region.rstrip('r').split('/')]
+        except ValueError:
+            raise NotImplementedError, 'region %s'%region
+        if len(r) != 4:
+            raise NotImplementedError, 'region %s'%region
+        if rectangular:
+            (w,s,e,n) = r
+        else:
+            (w,e,s,n) = r
+
+        # parsing projection
+        if len(projection) < 2 or projection[0] not in 'BLSMX':
+            raise NotImplementedError, 'projection %s'%projection
+        self.type = projection[0]
+        params = projection[1:].split('/')
+        try:
+            if self.type == 'X':
+                self.__init_linear(params,w,e,s,n)
+                return
+            self.width = _size(params[-1],self.unit)
+            p = [numpy.radians(float(v)) for v in params[:-1]]
+        except (ValueError,IndexError):
+            raise NotImplementedError, 'projection %s'%projection
+        if self.type in 'BL' and len(p) == 4:
+            self.__init_conic(p)
+        elif self.type == 'S' and len(p) in [2,3]:
+            # the optional horizon does not change the projection
+            self.__init_stereo(p)
+        elif self.type == 'M' and len(p) <= 2:
+            # lon0 defaults to the middle of the region, the
+            # standard parallel only changes the scale
+            if len(p) > 0:
+                self.lon0 = p[0]
+            else:
+                self.lon0 = numpy.radians((w+e)/2.)
+        else:
+            raise NotImplementedError, 'projection %s'%projection
+
+        # finding extent of map
+        if rectangular:
+            (x,y) = self._forward(numpy.radians([w,e]),numpy.radians([s,n]))
+        else:
+            lons = numpy.linspace(w,e,_NBOUNDARY)
+            lats = numpy.linspace(s,n,_NBOUNDARY)
+            (x,y) = self._forward(numpy.radians(numpy.concatenate((lons,lons,[w]*_NBOUNDARY,[e]*_NBOUNDARY))),
+                                  numpy.radians(numpy.concatenate(([s]*_NBOUNDARY,[n]*_NBOUNDARY,lats,lats))))
+        self.x0 = x.min()
+        self.y0 = y.min()
+        self.xscale = self.width/(x.max()-self.x0)
+        self.yscale = self.xscale
+
+    def __init_linear(self,params,w,e,s,n):
+        """Set up linear (and logarithmic) projection."""
+
+        if len(params) == 1:
+            params = [params[0],params[0]]
+        if len(params) != 2:
+            raise ValueError
+        self.log = []
+        size = []
+        for v in params:
+            self.log.append(v.endswith('l'))
+            size.append(_size(v.rstrip('l'),self.unit))
+        self.x0 = [w,s]
+        self.x1 = [e,n]
+        for i in [0,1]:
+            if self.log[i]:
+                self.x0[i] = numpy.log10(self.x0[i])
+                self.x1[i] = numpy.log10(self.x1[i])
+        self.size = size
+
+    def __init_conic(self,p):
+        """Set up Albers and Lambert conic projection."""
+
+        e = self.e
+        (self.lon0,lat0,lat1,lat2) = p
+        m1 = _m(lat1,e)
+        m2 = _m(lat2,e)
+        if self.type == 'B':
+            (q0,q1,q2) = (_q(lat0,e),_q(lat1,e),_q(lat2,e))
+            if abs(lat1-lat2) < 1e-10:
+                self.n = numpy.sin(lat1)
+            else:
+                self.n = (m1*m1-m2*m2)/(q2-q1)
+            self.C = m1*m1+self.n*q1
+            self.rho0 = numpy.sqrt(self.C-self.n*q0)/self.n
+        else:
+            (t0,t1,t2) = (_t(lat0,e),_t(lat1,e),_t(lat2,e))
+            if abs(lat1-lat2) < 1e-10:
+                self.n = numpy.sin(lat1)
+            else:
+                self.n = (numpy.log(m1)-numpy.log(m2))/(numpy.log(t1)-numpy.log(t2))
+            self.F = m1/(self.n*t1**self.n)
+            self.rho0 = self.F*t0**self.n
+
+    def __init_stereo(self,p):
+        """Set up stereographic projection, GMT uses conformal latitudes."""
+
+        self.lon0 = p[0]
+        chi0 = _conformal(p[1],self.e)
+        self.sinchi0 = numpy.sin(chi0)
+        self.coschi0 = numpy.cos(chi0)
+
+    def _forward(self,lon,lat):
+        """Project radians to projection coordinates."""
+
+        e = self.e
+        dlon = _wrap(lon-self.lon0)
+        if self.type in 'BL':
+            if self.type == 'B':
+                rho = numpy.sqrt(numpy.maximum(self.C-self.n*_q(lat,e),0.))/self.n
+            else:
+                rho = self.F*_t(lat,e)**self.n
+            theta = self.n*dlon
+            return (rho*numpy.sin(theta),self.rho0-rho*numpy.cos(theta))
+        if self.type == 'S':
+            chi = _conformal(lat,e)
+            k = 2./(1.+self.sinchi0*numpy.sin(chi)+self.coschi0*numpy.cos(chi)*numpy.cos(dlon))
+            return (k*numpy.cos(chi)*numpy.sin(dlon),
+                    k*(self.coschi0*numpy.sin(chi)-self.sinchi0*numpy.cos(chi)*numpy.cos(dlon)))
+        # Mercator
+        return (dlon,numpy.log(numpy.tan(numpy.pi/4.+_conformal(lat,e)/2.)))
+
+    def _inverse(self,x,y):
+        """Convert projection coordinates to radians."""
+
+        e = self.e
+        if self.type in 'BL':
+            dy = self.rho0-y
+            if self.n < 0:
+                rho = -numpy.sqrt(x*x+dy*dy)
+                theta = numpy.arctan2(-x,-dy)
+            else:
+                rho = numpy.sqrt(x*x+dy*dy)
+                theta = numpy.arctan2(x,dy)
+            if self.type == 'B':
+                q = (self.C-(rho*self.n)**2)/self.n
+                lat = self.__invert_q(q)
+            else:
+                t = (rho/self.F)**(1./self.n)
+                lat = _geodetic(numpy.pi/2.-2.*numpy.arctan(t),e)
+            return (self.lon0+theta/self.n,lat)
+        if self.type == 'S':
+            rho = numpy.sqrt(x*x+y*y)
+            c = 2.*numpy.arctan(rho/2.)
+            rho = numpy.where(rho==0.,1.,rho)
+            sinchi = numpy.cos(c)*self.sinchi0+y*numpy.sin(c)*self.coschi0/rho
+            chi = numpy.arcsin(numpy.clip(sinchi,-1.,1.))
+            lon = self.lon0+numpy.arctan2(x*numpy.sin(c),
+                                          rho*self.coschi0*numpy.cos(c)-y*self.sinchi0*numpy.sin(c))
+            return (lon,_geodetic(chi,e))
+        # Mercator
+        return (self.lon0+x,_geodetic(2.*numpy.arctan(numpy.exp(y))-numpy.pi/2.,e))
+
+    def __invert_q(self,q):
+        """Latitude from authalic function q."""
+
+        e = self.e
+        lat = numpy.arcsin(numpy.clip(q/2.,-1.,1.))
+        if e == 0.:
+            return lat
+        for i in range(_NITER):
+            s = numpy.sin(lat)
+            es2 = 1.-(e*s)**2
+            cos = numpy.maximum(numpy.cos(lat),1e-12)
+            lat = lat+es2*es2/(2.*cos)*(q/(1.-e*e)-s/es2+numpy.log((1.-e*s)/(1.+e*s))/(2.*e))
+        return lat
+
+    def forward(self,lon,lat):
+        """Project geographic coordinates.
+
+        lon: list/array of longitudes
+        lat: list/array of latitudes
+        on return: tuple of arrays containing plot x and y coordinates"""
+
+        lon = numpy.asarray(lon,dtype=numpy.float64)
+        lat = numpy.asarray(lat,dtype=numpy.float64)
+        if self.type == 'X':
+            return tuple([self.__linear(v,i) for (i,v) in enumerate([lon,lat])])
+        (x,y) = self._forward(numpy.radians(lon),numpy.radians(lat))
+        return ((x-self.x0)*self.xscale,(y-self.y0)*self.yscale)
+
+    def inverse(self,x,y):
+        """Convert plot coordinates to geographic coordinates.
+
+        x: list/array of plot x coordinates
+        y: list/array of plot y coordinates
+        on return: tuple of arrays containing longitudes and latitudes"""
+
+        x = numpy.asarray(x,dtype=numpy.float64)
+        y = numpy.asarray(y,dtype=numpy.float64)
+        if self.type == 'X':
+            return tuple([self.__linear_inverse(v,i) for (i,v) in enumerate([x,y])])
+        (lon,lat) = self._inverse(x/self.xscale+self.x0,y/self.yscale+self.y0)
+        return (numpy.degrees(lon),numpy.degrees(lat))
+
+    def __linear(self,v,i):
+        if self.log[i]:
+            v = numpy.log10(v)
+        if self.size[i] < 0:
+            return (self.x1[i]-v)/(self.x1[i]-self.x0[i])*(-self.size[i])
+        return (v-self.x0[i])/(self.x1[i]-self.x0[i])*self.size[i]
+
+    def __linear_inverse(self,v,i):
+        if self.size[i] < 0:
+            v = self.x1[i]-v/(-self.size[i])*(self.x1[i]-self.x0[i])
+        else:
+            v = self.x0[i]+v/self.size[i]*(self.x1[i]-self.x0[i])
+        if self.log[i]:
+            v = 10.**v
+        return v
+
+def get_projection(projection,region,defaults=None):
+    """Return Projection for GMT projection and region strings.
+
+    projection: GMT projection string
+    region: GMT region string
+    defaults: Defaults providing MEASURE_UNIT and ELLIPSOID
+
+    Projections are cached. NotImplementedError is raised if the projection
+    is not supported or numpy projections are disabled, see enabled."""
+
+    if not enabled:
+        raise NotImplementedError, 'numpy projections are disabled'
+    if projection == None or region == None:
+        raise NotImplementedError, 'projection or region not set'
+    unit = 'cm'
+    ellipsoid = 'WGS-84'
+    if defaults != None:
+        try:
+            unit = defaults.GetCurrentItem('MEASURE_UNIT')
+        except KeyError:
+            pass
+        try:
+            ellipsoid = defaults.GetCurrentItem('ELLIPSOID')
+        except KeyError:
+            pass
+    key = (projection,region,unit,ellipsoid)
+    try:
+        return _projections[key]
+    except KeyError:
+        pass
+    prj = Projection(projection,region,unit=unit,ellipsoid=ellipsoid)
+    _projections[key] = prj
+    return prj
@@ -0,0 +1,201 @@
+# Copyright 2004, Magnus Hagdorn
+#
+# This file is part of PyGMT.
+#
+# PyGMT is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# PyGMT is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyGMT; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""Encoding and decoding of GMT data tables.
+
+Binary tables consist of rows of doubles in the host byte order and are
+passed to GMT programs using the -bi and -bo options. Text tables are
+formatted a whole table at a time. Multisegment tables (GMT option -M)
+separate segments by a '>' header line in text tables and by a row of
+NaNs in binary tables."""
+
+__all__=['pack_table','unpack_table','binary_input','binary_output',
+         'valid_rows','segments','format_table','decimate']
+
+import numpy
+
+def _numeric(column):
+    return not isinstance(column,basestring) and numpy.asarray(column).dtype.kind in 'biuf'
+
+def valid_rows(columns):
+    """Find rows whose numbers are all finite.
+
+    columns: list of lists/arrays of equal length, columns of strings are ignored
+
+    returns a boolean array"""
+
+    mask = None
+    for c in columns:
+        if _numeric(c):
+            finite = numpy.isfinite(numpy.asarray(c,dtype=numpy.float64))
+            if mask is None:
+                mask = finite
+            else:
+                mask = mask & finite
+    return mask
+
+def segments(columns):
+    """Find runs of valid rows.
+
+    columns: list of lists/arrays of equal length
+
+    returns list of (start,stop) tuples of the runs of rows whose numbers
+    are all finite, rows with non-finite values separate the runs"""
+
+    mask = numpy.concatenate(([False],valid_rows(columns),[False])).astype(numpy.int8)
+    edges = numpy.flatnonzero(numpy.diff(mask))
+    return zip(edges[0::2].tolist(),edges[1::2].tolist())
+
+def decimate(y, pixels):
+    """Find the rows needed to draw a line at a given resolution.
+
+    y: y coordinates of the line
+    pixels: pixel column of each point, i.e. its horizontal position on
+            paper times the resolution
+
+    returns a boolean array selecting the first, last, lowest and highest
+    point of each run of consecutive points within the same pixel column.
+    Rows with non-finite values are kept, so segments stay separated."""
+
+    y = numpy.asarray(y,dtype=numpy.float64)
+    pixels = numpy.asarray(pixels,dtype=numpy.float64)
+    n = len(y)
+    if n == 0:
+        return numpy.zeros(0,dtype=bool)
+    finite = numpy.isfinite(y) & numpy.isfinite(pixels)
+    column = numpy.floor(numpy.where(finite,pixels,0.))
+    y = numpy.where(finite,y,0.)
+
+    # runs of points in the same column, non-finite rows are runs of their own
+    start = numpy.ones(n,dtype=bool)
+    start[1:] = (column[1:] != column[:-1]) | ~finite[1:] | ~finite[:-1]
+    starts = numpy.flatnonzero(start)
+    lengths = numpy.diff(numpy.append(starts,n))
+
+    index = numpy.arange(n)
+    keep = numpy.zeros(n,dtype=bool)
+    keep[starts] = True
+    keep[starts+lengths-1] = True
+    for reduce in (numpy.minimum,numpy.maximum):
+        extreme = numpy.repeat(reduce.reduceat(y,starts),lengths)
+        keep[numpy.minimum.reduceat(numpy.where(y==extreme,index,n),starts)] = True
+    return keep
+
+def format_table(columns, formats=None, segments=None, header=''):
+    """Format columns as a GMT text table.
+
+    columns: list of lists/arrays of equal length or single values, a single
+             value is written unchanged in every row
+    formats: list of formats of the columns, by default %f for numbers and %s otherwise
+    segments: list of (start,stop) row ranges written as segments of a
+              multisegment table, if None rows with non-finite numbers are dropped
+    header: text of the segment headers, e.g. -W and -G options
+
+    returns a string containing the table"""
+
+    fmts = []
+    values = []
+    for i in range(0,len(columns)):
+        c = columns[i]
+        if isinstance(c,basestring) or numpy.ndim(c) == 0:
+            fmts.append(str(c).replace('%','%%'))
+            continue
+        if formats != None:
+            fmts.append(formats[i])
+        elif _numeric(c):
+            fmts.append('%f')
+        else:
+            fmts.append('%s')
+        if _numeric(c):
+            values.append(numpy.asarray(c,dtype=numpy.float64))
+        else:
+            values.append(numpy.asarray(c,dtype=object))
+    rowfmt = ' '.join(fmts)+'\n'
+
+    if segments == None:
+        mask = valid_rows(values)
+        if mask is not None and not mask.all():
+            values = [v[mask] for v in values]
+        return _format_rows(rowfmt,values)
+    if len(header) > 0:
+        header = '> %s\n'%header
+    else:
+        header = '>\n'
+    return ''.join([header+_format_rows(rowfmt,[v[start:stop] for v in values])
+                    for (start,stop) in segments])
+
+def _format_rows(rowfmt, values):
+    """Format rows of values in one go."""
+
+    nrows = len(values[0])
+    if nrows == 0:
+        return ''
+    if all([v.dtype != object for v in values]):
+        table = numpy.column_stack(values)
+    else:
+        table = numpy.empty((nrows,len(values)),dtype=object)
+        for i in range(0,len(values)):
+            table[:,i] = values[i]
+    return (rowfmt*nrows) % tuple(table.ravel().tolist())
+
+def pack_table(columns, dropnan=False, segments=None):
+    """Pack columns into a binary GMT table.
+
+    columns: list of lists/arrays of equal length
+    dropnan: if True, skip rows containing non-finite values
+    segments: list of (start,stop) row ranges packed as segments of a
+              multisegment table, each preceded by a row of NaNs
+
+    returns a string containing the table"""
+
+    table = numpy.empty((len(columns[0]),len(columns)),dtype=numpy.float64)
+    for i in range(0,len(columns)):
+        table[:,i] = columns[i]
+    if segments != None:
+        parts = []
+        header = numpy.empty((1,len(columns)),dtype=numpy.float64)
+        header[:] = numpy.nan
+        for (start,stop) in segments:
+            parts.append(header)
+            parts.append(table[start:stop])
+        if len(parts) == 0:
+            return ''
+        table = numpy.concatenate(parts)
+    elif dropnan:
+        table = table[numpy.isfinite(table).all(axis=1)]
+    return table.tostring()
+
+def unpack_table(data, ncol):
+    """Unpack a binary GMT table.
+
+    data: string containing the table
+    ncol: number of columns
+
+    returns an array of shape (rows, ncol)"""
+
+    return numpy.frombuffer(data,dtype=numpy.float64).reshape(-1,ncol)
+
+def binary_input(ncol):
+    """GMT option for reading a binary table with ncol columns."""
+
+    return '-bid%d'%ncol
+
+def binary_output():
+    """GMT option for writing a binary table."""
+
+    return '-bod'
@@ -18,8 +18,12 @@
 
 from PyGMTutil import *
 from PyGMTcommand import *
+from PyGMTtable import *
+from PyGMTcache import *
 from PyGMTcanvas import *
+from PyGMTbatch import *
 from PyGMTarea import *
 from PyGMTautoxy import *
 from PyGMTgrid import *
+from PyGMTproject import *
 from PyGMTlegend import *
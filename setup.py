@@ -22,8 +22,8 @@ from distutils.core import setup, Extension
 import os, sys,os.path
 import numpy
 
-if not hasattr(sys, 'version_info') or sys.version_info < (2,3,0,'alpha',0):
-    raise SystemExit, "Python 2.3 or later required to build Numeric."
+if not hasattr(sys, 'version_info') or sys.version_info < (2,7,0,'alpha',0):
+    raise SystemExit, "Python 2.7 or later required to build PyGMT."
 
 def check_lib(libname,prefix_var,header):
     """Check if we can find header either in the directory where the environment
@@ -24,8 +24,8 @@
 #include <stdio.h>
 #include <string.h>
 #include <assert.h>
+#include <math.h>
 
-#define PYARRAY(array,i,j) (*(double *) ((array)->data + (i)*(array)->strides[0]+(j)*(array)->strides[1]))
 
 /* prototypes copied from gmt_customio.c */
 int GMT_native_read_grd_header (FILE *fp, struct GRD_HEADER *header);
@@ -35,55 +35,202 @@ int GMT_native_write_grd_header (FILE *fp, struct GRD_HEADER *header);
 void print_header(struct GRD_HEADER header);
 static PyObject * gmtio_write(PyObject * self, PyObject * args);
 static PyObject * gmtio_read(PyObject * self, PyObject * args);
+static PyObject * gmtio_read_header(PyObject * self, PyObject * args);
 
-static PyObject * gmtio_read(PyObject * self, PyObject * args)
+/* GMT stores grids row by row starting with the top row, PyGMT arrays are
+   indexed [x,y] starting with the bottom row. Arrays may be float or double
+   and have any strides. If x is the fast index of the array (Fortran order
+   or a flipped view of a GMT grid) rows are copied directly, otherwise
+   (C order) blocks of ROW_BLOCK rows are transposed column by column. */
+
+/* number of rows converted at a time */
+#define ROW_BLOCK 64
+
+#define GET_VALUE(p,is_float) ((is_float) ? (double) *(const float *) (p) : *(const double *) (p))
+#define SET_VALUE(p,is_float,v) if (is_float) *(float *) (p) = (v); else *(double *) (p) = (double) (v)
+
+/* check if x is the fast index of array */
+static int x_is_fast(PyArrayObject *array)
 {
-  PyObject *GMT_file;               /* Python file to write to */
-  PyStringObject *GMT_xunits;      /* units in x-direction */
-  PyStringObject *GMT_yunits;      /* units in y-direction */
-  PyStringObject *GMT_zunits;      /* grid value units */
-  PyStringObject *GMT_title;        /* name of data set */
-  PyStringObject *GMT_remark;       /* comments re this data set */
-  PyArrayObject  *GMT_data;         /* Python array containing data as doubles */
-  PyArrayObject  *GMT_xminmax, *GMT_yminmax;
+  npy_intp s0 = PyArray_STRIDE(array,0);
+  npy_intp s1 = PyArray_STRIDE(array,1);
 
-  struct GRD_HEADER gmtheader;    /* GMT header to be written to file */
+  return (s0 < 0 ? -s0 : s0) <= (s1 < 0 ? -s1 : s1);
+}
 
-  FILE *input;                     /* read from this file */
-  int dimminmax=2;
-  int datadims[2];
-  float data;
-  int i,j;
-  char *filename=NULL;
-  int file_type=0; /* can be 1 for a stream or 2 for a file name */
+/* copy rows r0 to r0+nrows-1 of GMT ordered buffer into array */
+static void rows_to_array(const float *buffer, PyArrayObject *array, npy_intp r0, npy_intp nrows)
+{
+  npy_intp i,r;
+  npy_intp nx = PyArray_DIM(array,0);
+  npy_intp ny = PyArray_DIM(array,1);
+  npy_intp s0 = PyArray_STRIDE(array,0);
+  npy_intp s1 = PyArray_STRIDE(array,1);
+  int is_float = (PyArray_TYPE(array) == NPY_FLOAT);
+  char *p;
+  const float *b;
+
+  if (x_is_fast(array))
+    for (r=r0;r<r0+nrows;r++)
+      {
+	p = PyArray_BYTES(array) + (ny-1-r)*s1;
+	b = buffer + (r-r0)*nx;
+	for (i=0;i<nx;i++,p+=s0)
+	  SET_VALUE(p,is_float,b[i]);
+      }
+  else
+    for (i=0;i<nx;i++)
+      {
+	p = PyArray_BYTES(array) + i*s0 + (ny-1-r0)*s1;
+	b = buffer + i;
+	for (r=r0;r<r0+nrows;r++,p-=s1,b+=nx)
+	  SET_VALUE(p,is_float,*b);
+      }
+}
 
-  /* parsing arguments */
-  if (!PyArg_ParseTuple(args, "O", &GMT_file))
-    return NULL;
-      
+/* copy GMT ordered buffer into array */
+static void buffer_to_array(const float *buffer, PyArrayObject *array)
+{
+  npy_intp r;
+  npy_intp nx = PyArray_DIM(array,0);
+  npy_intp ny = PyArray_DIM(array,1);
 
-  /* read GMT header */
-  if (PyFile_Check(GMT_file)) /* checking if GMT_file is a file object */
+  for (r=0;r<ny;r+=ROW_BLOCK)
+    rows_to_array(buffer + r*nx, array, r, (ny-r < ROW_BLOCK) ? ny-r : ROW_BLOCK);
+}
+
+/* copy rows r0 to r0+nrows-1 of array into GMT ordered buffer */
+static void array_to_rows(PyArrayObject *array, float *buffer, npy_intp r0, npy_intp nrows)
+{
+  npy_intp i,r;
+  npy_intp nx = PyArray_DIM(array,0);
+  npy_intp ny = PyArray_DIM(array,1);
+  npy_intp s0 = PyArray_STRIDE(array,0);
+  npy_intp s1 = PyArray_STRIDE(array,1);
+  int is_float = (PyArray_TYPE(array) == NPY_FLOAT);
+  const char *p;
+  float *b;
+
+  if (x_is_fast(array))
+    for (r=r0;r<r0+nrows;r++)
+      {
+	p = PyArray_BYTES(array) + (ny-1-r)*s1;
+	b = buffer + (r-r0)*nx;
+	for (i=0;i<nx;i++,p+=s0)
+	  b[i] = (float) GET_VALUE(p,is_float);
+      }
+  else
+    for (i=0;i<nx;i++)
+      {
+	p = PyArray_BYTES(array) + i*s0 + (ny-1-r0)*s1;
+	b = buffer + i;
+	for (r=r0;r<r0+nrows;r++,p-=s1,b+=nx)
+	  *b = (float) GET_VALUE(p,is_float);
+      }
+}
+
+/* find z min/max of array, NaNs are ignored */
+static void find_minmax(PyArrayObject *array, double *z_min, double *z_max)
+{
+  npy_intp i,j,n0,n1,s0,s1;
+  int is_float = (PyArray_TYPE(array) == NPY_FLOAT);
+  const char *p;
+  double v, zmin=0., zmax=0.;
+  int found = 0;
+
+  /* loop over the fast index in the inner loop */
+  if (x_is_fast(array))
     {
-      
-      file_type = 1;
+      n0 = PyArray_DIM(array,1); s0 = PyArray_STRIDE(array,1);
+      n1 = PyArray_DIM(array,0); s1 = PyArray_STRIDE(array,0);
+    }
+  else
+    {
+      n0 = PyArray_DIM(array,0); s0 = PyArray_STRIDE(array,0);
+      n1 = PyArray_DIM(array,1); s1 = PyArray_STRIDE(array,1);
+    }
+  for (i=0;i<n0;i++)
+    {
+      p = PyArray_BYTES(array) + i*s0;
+      for (j=0;j<n1;j++,p+=s1)
+	{
+	  v = GET_VALUE(p,is_float);
+	  if (v != v) /* NaN */
+	    continue;
+	  if (!found)
+	    {
+	      zmin = zmax = v;
+	      found = 1;
+	    }
+	  else if (v < zmin)
+	    zmin = v;
+	  else if (v > zmax)
+	    zmax = v;
+	}
+    }
+  if (!found)
+    zmin = zmax = NAN;
+  *z_min = zmin;
+  *z_max = zmax;
+}
 
-      /* getting the file handle */
-      input = PyFile_AsFile(GMT_file);
+/* write array to file in GMT order without holding the interpreter lock,
+   buffer must hold ROW_BLOCK rows, returns 0 on failure */
+static int write_array(PyObject *file, PyArrayObject *array, float *buffer)
+{
+  FILE *fp = PyFile_AsFile(file);
+  npy_intp r, nrows;
+  npy_intp nx = PyArray_DIM(array,0);
+  npy_intp ny = PyArray_DIM(array,1);
+  int ok = 1;
+
+  PyFile_IncUseCount((PyFileObject *) file);
+  Py_BEGIN_ALLOW_THREADS
+  for (r=0;r<ny && ok;r+=ROW_BLOCK)
+    {
+      nrows = (ny-r < ROW_BLOCK) ? ny-r : ROW_BLOCK;
+      array_to_rows(array, buffer, r, nrows);
+      ok = (fwrite(buffer, sizeof(float), nrows*nx, fp) == (size_t) (nrows*nx));
+    }
+  Py_END_ALLOW_THREADS
+  PyFile_DecUseCount((PyFileObject *) file);
+  return ok;
+}
+
+/* read n floats from file without holding the interpreter lock,
+   returns the number of floats read */
+static size_t read_floats(PyObject *file, float *buffer, size_t n)
+{
+  FILE *fp = PyFile_AsFile(file);
+  size_t nread;
+
+  PyFile_IncUseCount((PyFileObject *) file);
+  Py_BEGIN_ALLOW_THREADS
+  nread = fread(buffer, sizeof(float), n, fp);
+  Py_END_ALLOW_THREADS
+  PyFile_DecUseCount((PyFileObject *) file);
+  return nread;
+}
 
+/* read GMT header from a file object or the file named by a string
+   returns 1 for a file object, 2 for a file name and 0 on failure
+   for file names, filename is set to a copy of the name which must be freed */
+static int read_header(PyObject *GMT_file, struct GRD_HEADER *gmtheader, char **filename)
+{
+  if (PyFile_Check(GMT_file)) /* checking if GMT_file is a file object */
+    {
       /* read the header */
-      if (GMT_native_read_grd_header(input,&gmtheader)!=GMT_NOERROR)
+      if (GMT_native_read_grd_header(PyFile_AsFile(GMT_file),gmtheader)!=GMT_NOERROR)
 	{
 	  PyErr_SetString(PyExc_IOError, "Error, reading GMT header from file");
-	  return NULL;
+	  return 0;
 	}  
+      return 1;
     }
   else if (PyString_Check(GMT_file)) /* check if GMT_file is a string (and assume it's a file name) */
     {
-      filename = strdup(PyString_AsString(GMT_file)); // DO NOT FREE or modify filename
-      assert(filename); 
-
-      file_type = 2;
+      *filename = strdup(PyString_AsString(GMT_file)); // DO NOT modify filename
+      assert(*filename); 
 
       /* read the header */
       {
@@ -92,69 +239,127 @@ static PyObject * gmtio_read(PyObject * self, PyObject * args)
 	const int false=(1==0);
 	
 	argc=GMT_begin(argc,argv); // Sets crazy globals
-	GMT_grd_init (&gmtheader, argc, argv, false); // Initialize grd header structure 
-	GMT_read_grd_info (filename,&gmtheader);
+	GMT_grd_init (gmtheader, argc, argv, false); // Initialize grd header structure 
+	if (GMT_read_grd_info (*filename,gmtheader))
+	  {
+	    PyErr_SetString(PyExc_IOError, "Error, reading GMT header from file");
+	    free(*filename);
+	    *filename = NULL;
+	    return 0;
+	  }
       }
+      return 2;
     }
-  else
+  PyErr_SetString(PyExc_TypeError, "Error, need a File object or a file name (string)");
+  return 0;
+}
+
+static PyObject * gmtio_read_header(PyObject * self, PyObject * args)
+{
+  PyObject *GMT_file;               /* Python file or file name to read from */
+  struct GRD_HEADER gmtheader;    /* GMT header read from file */
+  char *filename=NULL;
+
+  /* parsing arguments */
+  if (!PyArg_ParseTuple(args, "O", &GMT_file))
+    return NULL;
+
+  if (read_header(GMT_file, &gmtheader, &filename) == 0)
+    return NULL;
+  free(filename);
+
+  return Py_BuildValue("{s:i,s:i,s:i,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:s,s:s,s:s,s:s,s:s,s:s}",
+		       "nx", gmtheader.nx,
+		       "ny", gmtheader.ny,
+		       "node_offset", gmtheader.node_offset,
+		       "x_min", gmtheader.x_min,
+		       "x_max", gmtheader.x_max,
+		       "y_min", gmtheader.y_min,
+		       "y_max", gmtheader.y_max,
+		       "z_min", gmtheader.z_min,
+		       "z_max", gmtheader.z_max,
+		       "x_inc", gmtheader.x_inc,
+		       "y_inc", gmtheader.y_inc,
+		       "z_scale_factor", gmtheader.z_scale_factor,
+		       "z_add_offset", gmtheader.z_add_offset,
+		       "x_units", gmtheader.x_units,
+		       "y_units", gmtheader.y_units,
+		       "z_units", gmtheader.z_units,
+		       "title", gmtheader.title,
+		       "command", gmtheader.command,
+		       "remark", gmtheader.remark);
+}
+
+static PyObject * gmtio_read(PyObject * self, PyObject * args)
+{
+  PyObject *GMT_file;               /* Python file to write to */
+  PyStringObject *GMT_xunits;      /* units in x-direction */
+  PyStringObject *GMT_yunits;      /* units in y-direction */
+  PyStringObject *GMT_zunits;      /* grid value units */
+  PyStringObject *GMT_title;        /* name of data set */
+  PyStringObject *GMT_remark;       /* comments re this data set */
+  PyArrayObject  *GMT_data;         /* Python array containing data as floats or doubles */
+  PyArrayObject  *GMT_xminmax, *GMT_yminmax;
+
+  struct GRD_HEADER gmtheader;    /* GMT header to be written to file */
+
+  int dimminmax=2;
+  int datadims[2];
+  size_t nm;
+  float *buffer;
+  char *filename=NULL;
+  int file_type=0; /* can be 1 for a stream or 2 for a file name */
+  PyArray_Descr *dtype=NULL;        /* type of returned data array */
+  int typenum=NPY_DOUBLE;
+  double w=0., e=0., s=0., n=0.;    /* subregion to be read from file names */
+
+  /* parsing arguments */
+  if (!PyArg_ParseTuple(args, "O|O&dddd", &GMT_file, PyArray_DescrConverter2, &dtype, &w, &e, &s, &n))
+    return NULL;
+  if (dtype != NULL)
     {
-      PyErr_SetString(PyExc_TypeError, "Error, need a File object or a file name (string)");
-      return NULL;
+      typenum = dtype->type_num;
+      Py_DECREF(dtype);
+      if (typenum != NPY_FLOAT && typenum != NPY_DOUBLE)
+	{
+	  PyErr_SetString(PyExc_ValueError, "Error, data type must be float32 or float64");
+	  return NULL;
+	}
     }
+      
 
-  /* extracting header information */
-  /* creating min/max arrays */
-  GMT_xminmax = (PyArrayObject *) PyArray_FromDims(1,&dimminmax,NPY_DOUBLE);
-  *(double *) (GMT_xminmax->data) = gmtheader.x_min;
-  *(double *) (GMT_xminmax->data+(GMT_xminmax->strides[0])) = gmtheader.x_max;
-  GMT_yminmax = (PyArrayObject *) PyArray_FromDims(1,&dimminmax,NPY_DOUBLE);
-  *(double *) (GMT_yminmax->data) = gmtheader.y_min;
-  *(double *) (GMT_yminmax->data+(GMT_yminmax->strides[0])) = gmtheader.y_max;
-  /* strings...*/
-  GMT_xunits = (PyStringObject *) PyString_FromString(gmtheader.x_units);
-  GMT_yunits = (PyStringObject *) PyString_FromString(gmtheader.y_units);
-  GMT_zunits = (PyStringObject *) PyString_FromString(gmtheader.z_units);
-  GMT_title = (PyStringObject *) PyString_FromString(gmtheader.title);
-  GMT_remark = (PyStringObject *) PyString_FromString(gmtheader.remark);
-  
-  /* creating data array */
-  datadims[0] = gmtheader.nx;
-  datadims[1] = gmtheader.ny;
-  GMT_data = (PyArrayObject *) PyArray_FromDims(2,datadims,NPY_DOUBLE);
+  /* read GMT header */
+  file_type = read_header(GMT_file, &gmtheader, &filename);
+  if (file_type == 0)
+    return NULL;
 
   /* read data */
+  nm = (size_t) gmtheader.nx * (size_t) gmtheader.ny;
   if (file_type == 1)
     {
-      for (j=gmtheader.ny-1;j>=0;j--)
-	for (i=0;i<gmtheader.nx;i++)
-	  {
-	    fread(&data,sizeof(float),1,input);
-	    PYARRAY(GMT_data,i,j) = (double) data;
-	  }
+      buffer = (float *) malloc(nm * sizeof(float));
+      if (buffer == NULL)
+	return PyErr_NoMemory();
+      if (read_floats(GMT_file, buffer, nm) != nm)
+	{
+	  free(buffer);
+	  PyErr_SetString(PyExc_IOError, "Error, reading GMT grid data from file");
+	  return NULL;
+	}
     }
   else if (file_type == 2)
     {
-      const size_t nm = gmtheader.nx * gmtheader.ny;
-      float *a;
-      a = (float *) GMT_memory (VNULL, (size_t)nm, sizeof (float), GMT_program);
+      buffer = (float *) GMT_memory (VNULL, (size_t)nm, sizeof (float), GMT_program);
       
-      // Read the entire grd image
-      if (GMT_read_grd (filename, &gmtheader, a, 0.0, 0.0, 0.0, 0.0, GMT_pad, FALSE)) {
+      // Read the entire grd image or the subregion w/e/s/n, the header
+      // is updated to describe the subregion
+      if (GMT_read_grd (filename, &gmtheader, buffer, w, e, s, n, GMT_pad, FALSE)) {
 	// Bad?  free memory and bail
 	PyErr_SetString(PyExc_RuntimeError,"Failed to read GMT grid file");
+	GMT_free ((void *) buffer);
 	free(filename);
 	return NULL;
       }
-      {
-	int count=0;
-	for (j=gmtheader.ny-1;j>=0;j--)
-	  for (i=0;i<gmtheader.nx;i++)
-	    {
-	      /*data = (float) i + j/10.;*/
-	      data = a[count++];
-	      PYARRAY(GMT_data,i,j) = (double) data;
-	    }
-      }
       free (filename);
     }
   else
@@ -163,8 +368,35 @@ static PyObject * gmtio_read(PyObject * self, PyObject * args)
       return NULL;
     }
 
+  /* creating data array */
+  datadims[0] = gmtheader.nx;
+  datadims[1] = gmtheader.ny;
+  GMT_data = (PyArrayObject *) PyArray_FromDims(2,datadims,typenum);
+  if (GMT_data != NULL)
+    buffer_to_array(buffer, GMT_data);
+  if (file_type == 1)
+    free(buffer);
+  else
+    GMT_free ((void *) buffer);
+  if (GMT_data == NULL)
+    return NULL;
 
-  return Py_BuildValue("OOiddOOOOOO",
+  /* extracting header information */
+  /* creating min/max arrays */
+  GMT_xminmax = (PyArrayObject *) PyArray_FromDims(1,&dimminmax,NPY_DOUBLE);
+  *(double *) (GMT_xminmax->data) = gmtheader.x_min;
+  *(double *) (GMT_xminmax->data+(GMT_xminmax->strides[0])) = gmtheader.x_max;
+  GMT_yminmax = (PyArrayObject *) PyArray_FromDims(1,&dimminmax,NPY_DOUBLE);
+  *(double *) (GMT_yminmax->data) = gmtheader.y_min;
+  *(double *) (GMT_yminmax->data+(GMT_yminmax->strides[0])) = gmtheader.y_max;
+  /* strings...*/
+  GMT_xunits = (PyStringObject *) PyString_FromString(gmtheader.x_units);
+  GMT_yunits = (PyStringObject *) PyString_FromString(gmtheader.y_units);
+  GMT_zunits = (PyStringObject *) PyString_FromString(gmtheader.z_units);
+  GMT_title = (PyStringObject *) PyString_FromString(gmtheader.title);
+  GMT_remark = (PyStringObject *) PyString_FromString(gmtheader.remark);
+
+  return Py_BuildValue("NNiddNNNNNN",
 		       GMT_xminmax,
 		       GMT_yminmax,
 		       gmtheader.node_offset,
@@ -195,15 +427,15 @@ static PyObject * gmtio_write(PyObject * self, PyObject * args)
   PyStringObject *GMT_remark;       /* comments re this data set */
   PyArrayObject  *GMTin_data;       /* Python array containing grid values */
 
-  PyArrayObject  *GMT_data;         /* Python array containing data as doubles */
+  PyArrayObject  *GMT_data;         /* Python array containing data as floats or doubles */
   PyArrayObject  *GMT_xminmax, *GMT_yminmax;
 
   struct GRD_HEADER gmtheader;    /* GMT header to be written to file */
 
   FILE *output;                     /* write to this file */
 
-  int i,j;
-  float data;
+  float *buffer;
+  int ok;
 
   /* parsing arguments */
   if (!PyArg_ParseTuple(args, "O!O!O!iddO!O!O!O!O!O!", 
@@ -239,7 +471,16 @@ static PyObject * gmtio_write(PyObject * self, PyObject * args)
       PyErr_SetString(PyExc_ValueError,"input data array must be 2D");
       return NULL;
     } 
-  GMT_data = (PyArrayObject *) PyArray_ContiguousFromObject((PyObject *) GMTin_data, NPY_DOUBLE, 2, 2);
+  /* aligned float and double arrays are used as they are whatever their
+     strides, everything else is converted to doubles */
+  if ((PyArray_TYPE(GMTin_data) == NPY_FLOAT || PyArray_TYPE(GMTin_data) == NPY_DOUBLE) &&
+      PyArray_ISALIGNED(GMTin_data) && PyArray_ISNOTSWAPPED(GMTin_data))
+    {
+      GMT_data = GMTin_data;
+      Py_INCREF(GMT_data);
+    }
+  else
+    GMT_data = (PyArrayObject *) PyArray_ContiguousFromObject((PyObject *) GMTin_data, NPY_DOUBLE, 2, 2);
   if (GMT_data == NULL)
     return NULL;
 
@@ -251,17 +492,14 @@ static PyObject * gmtio_write(PyObject * self, PyObject * args)
   gmtheader.x_max       = *(double *) (GMT_xminmax->data + GMT_xminmax->strides[0]);
   gmtheader.y_min       = *(double *) (GMT_yminmax->data);
   gmtheader.y_max       = *(double *) (GMT_yminmax->data + GMT_yminmax->strides[0]);
+  Py_DECREF(GMT_xminmax);
+  Py_DECREF(GMT_yminmax);
+
   /* finding z min/max */
-  gmtheader.z_min = *(double *) GMT_data->data;
-  gmtheader.z_max = *(double *) GMT_data->data;
-  for (i=0;i<GMT_data->dimensions[0];i++)
-    for (j=0;j<GMT_data->dimensions[1];j++)
-      {
-	if (gmtheader.z_min > PYARRAY(GMT_data,i,j))
-	  gmtheader.z_min = PYARRAY(GMT_data,i,j);
-	if (gmtheader.z_max < PYARRAY(GMT_data,i,j))
-	  gmtheader.z_max = PYARRAY(GMT_data,i,j);
-      }
+  Py_BEGIN_ALLOW_THREADS
+  find_minmax(GMT_data, &gmtheader.z_min, &gmtheader.z_max);
+  Py_END_ALLOW_THREADS
+
   /* setting x_inc, y_inc */
   if (gmtheader.node_offset==0)
     {
@@ -275,6 +513,7 @@ static PyObject * gmtio_write(PyObject * self, PyObject * args)
     }
   else
     {
+      Py_DECREF(GMT_data);
       PyErr_SetString(PyExc_ValueError,"node_offset must be either 0 or 1");
       return NULL;
     }
@@ -301,17 +540,26 @@ static PyObject * gmtio_write(PyObject * self, PyObject * args)
   /* writing header to file */
   if (GMT_native_write_grd_header (output, &gmtheader) != GMT_NOERROR)
     {
+      Py_DECREF(GMT_data);
       PyErr_SetString(PyExc_IOError, "Error, writing GMT header to file");
       return NULL;
     }
 
-  /* writing data */
-  for (j=gmtheader.ny-1;j>=0;j--)
-    for (i=0;i<gmtheader.nx;i++)
-      {
-	data = (float) PYARRAY(GMT_data,i,j);
-	fwrite(&data, sizeof(float), 1, output);
-      }
+  /* writing data, ROW_BLOCK rows at a time */
+  buffer = (float *) malloc((size_t) gmtheader.nx * ROW_BLOCK * sizeof(float));
+  if (buffer == NULL)
+    {
+      Py_DECREF(GMT_data);
+      return PyErr_NoMemory();
+    }
+  ok = write_array(GMT_file, GMT_data, buffer);
+  free(buffer);
+  Py_DECREF(GMT_data);
+  if (!ok)
+    {
+      PyErr_SetString(PyExc_IOError, "Error, writing GMT grid data to file");
+      return NULL;
+    }
   
   Py_INCREF(Py_None);
   return Py_None;
@@ -320,6 +568,7 @@ static PyObject * gmtio_write(PyObject * self, PyObject * args)
 static PyMethodDef gmtioMethods[] = {
   {"write", gmtio_write, METH_VARARGS, "write GMT binary grids"},
   {"read", gmtio_read, METH_VARARGS, "read GMT binary grids"},
+  {"read_header", gmtio_read_header, METH_VARARGS, "read header of GMT grids"},
   {NULL, NULL, 0, NULL}        /* Sentinel */
 };
 
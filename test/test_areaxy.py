@@ -16,7 +16,7 @@
 # along with PyGMT; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 
-import PyGMT
+import numpy,PyGMT
 
 plot = PyGMT.Canvas('blub.ps',size='A4')
 plot.defaults['LABEL_FONT_SIZE']='12p'
@@ -28,6 +28,43 @@ area.partext([1,4],5*'Hello, world! ')
 area.xlabel=1*'xaxis '
 area.ylabel=10*'yaxis '
 area.plotsymbol([2,4],[3,1],symbol=['c','a'])
+area.plotsymbol([5,6],[3,1],size=0.3,symbol='s')
 area.line('-W1/255/0/0',[2,3,4],[3,1.5,1])
+area.line('-W1/0/0/0',[0.01*i for i in range(1000)],[2+(i%7)*0.1 for i in range(1000)],dpi=72)
+area.lines('-W1',[[1,2,3],[1,2]],[[4,4.5,4],[2,1]],attributes=['-W1/0/0/255','-W3/0/255/0'])
+area.symbols([[6,7],[8]],[[3,3],[2]],size='0.3',symbol=['s','t'],attributes=['-G255/0/0','-G0/0/255'])
 area.coordsystem()
+
+# lines are reduced to pixel columns in the measure unit of the canvas
+x = [0.001*i for i in range(10000)]
+y = [(i%13)*0.01 for i in range(10000)]
+(cx,cy) = area.decimate(x,y,72)
+plot.defaults['MEASURE_UNIT'] = 'inch'
+(ix,iy) = area.decimate(x,y,72)
+del plot.defaults['MEASURE_UNIT']
+print 'decimated to %d points in cm and %d points in inch'%(len(cx),len(ix))
+assert len(ix) > 2*len(cx)
+
+# samples appended to an AutoXY series extend the region, points which are
+# not finite only break the line
+nan = float('nan')
+auto = PyGMT.AutoXY(plot,pos=[1,7],size=[10.,5.])
+x = [0.01*i for i in range(600)]
+y = [(i%11)*0.1 for i in range(600)]
+series = auto.line('-W1/0/0/255',x,y)
+chunks = [([nan],[nan]),
+          ([6+0.01*i for i in range(600)],[1+(i%5)*0.1 for i in range(600)]),
+          ([20,21,nan,23],[nan,-1,2,3]),
+          ([30+0.001*i for i in range(3000)],[0.5 for i in range(3000)])]
+for (cx,cy) in chunks:
+    auto.append(series,cx,cy)
+    x = x+cx
+    y = y+cy
+print 'appended series bounds:', auto.ll, auto.ur
+assert auto.ll == [0.,-1.] and auto.ur == [30+0.001*2999,3.]
+auto.coordsystem()
+(px,py) = series.columns(finite=False)
+print 'plotted %d points, %d not finite'%(len(px),numpy.isnan(py).sum())
+assert len(px) == len(x)
+assert numpy.allclose(px,x,equal_nan=True) and numpy.allclose(py,y,equal_nan=True)
 plot.close()
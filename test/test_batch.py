@@ -0,0 +1,32 @@
+# Copyright 2004, Magnus Hagdorn
+#
+# This file is part of PyGMT.
+#
+# PyGMT is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# PyGMT is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyGMT; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import PyGMT
+
+def figure(i):
+    c = PyGMT.Canvas('batch%d.ps'%i,size='A4')
+    area = PyGMT.AreaXY(c,size=[10.,10.])
+    area.setregion([0,0],[10,10])
+    area.line('-W1/255/0/0',[0,10],[0,i])
+    area.coordsystem()
+    c.close()
+
+result = PyGMT.render([lambda i=i: figure(i) for i in range(8)])
+print result
+for i in result.errors:
+    print result.errors[i]
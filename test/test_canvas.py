@@ -21,3 +21,23 @@ import PyGMT
 new = PyGMT.Canvas('blub.ps',size='A4')
 
 new.close()
+
+# deferred canvases run all GMT commands when they are closed, grids are
+# plotted as they were when the plot command was issued
+import numpy
+grid = PyGMT.Grid()
+grid.x_minmax = [0.,10.]
+grid.y_minmax = [0.,5.]
+grid.data = numpy.zeros((11,6))
+for cached in [True,False]:
+    PyGMT.grid_cache.enabled = cached
+    deferred = PyGMT.Canvas('deferred.ps',deferred=True)
+    area = PyGMT.AreaXY(deferred,size=[10.,5.])
+    area.setregion([0.,0.],[10.,5.])
+    area.image(grid,'deferred.cpt')
+    area.line('-W1',[0.,10.],[0.,5.])
+    grid.data[:,:] = 1.
+    deferred.close()
+    grid.data[:,:] = 0.
+    print deferred.report()
+PyGMT.grid_cache.enabled = True
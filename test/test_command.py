@@ -37,5 +37,25 @@ defaults['X_ORIGIN'] = '0.c'
 defaults['Y_ORIGIN'] = '0.c'
 defaults['ANNOT_MIN_ANGLE'] = '10'
 print defaults.GetCurrentSettings()
+print defaults.overrides()
+
+# settings of a child follow later changes of its parent unless set in the child
+child = PyGMT.Defaults(defaults.GetCurrentSettings(),table=defaults.table,parent=defaults)
+child['Y_ORIGIN'] = '1.c'
+defaults['MEASURE_UNIT'] = 'inch'
+defaults['Y_ORIGIN'] = '2.c'
+print child.GetCurrentItem('MEASURE_UNIT'), child.GetCurrentSettings()['MEASURE_UNIT']
+print child.GetCurrentItem('Y_ORIGIN')
+print child.overrides()
+assert child.GetCurrentItem('MEASURE_UNIT') == 'inch' and child.GetCurrentItem('Y_ORIGIN') == '1.c'
+del defaults['MEASURE_UNIT']
+defaults.apply()
 defaults.Reset()
 print defaults.GetCurrentSettings()
+
+# argument strings which have to be interpreted by a shell
+from PyGMT.PyGMTcommand import _parse_arguments
+for a in ['-Ba1:"x": 2>/dev/null','-T file*','-T file?.grd','-T [ab].grd','-T {a,b}.grd',
+          '-L 1>>log','-L >&2','-L | sort','~/grid.grd']:
+    print repr(a), _parse_arguments(a)
+print _parse_arguments('-Ba1:"x": -R0/1/0/1 > out.ps')
@@ -39,3 +39,31 @@ b.gridinfo()
 f=open('x','w')
 b.write(f)
 f.close()
+
+c = PyGMT.map_grid('x')
+c.gridinfo()
+
+f=open('x')
+d = PyGMT.read_grid_header(f)
+f.close()
+d.gridinfo()
+
+# the window is rounded outwards to the nodes covering the region
+f=open('x')
+e = PyGMT.read_grid(f,region=[2.5,5.,13.,15.5],stride=2)
+f.close()
+print 'window:', e.x_minmax, e.y_minmax, e.data.shape
+print 'window data match:', numpy.allclose(e.data,a[2:7:2,6:13:2])
+
+for (x,y) in b.contours(200.):
+    print 'contour with %d points starting at %f %f'%(len(x),x[0],y[0])
+
+# contour levels apply to the values scaled by z_scale and z_offset, like in GMT
+b.z_scale = 2.
+b.z_offset = -100.
+scaled = b.contours(300.)
+b.z_scale = 1.
+b.z_offset = 0.
+unscaled = b.contours(200.)
+print 'scaled contours match:', len(scaled) == len(unscaled) and \
+      all([numpy.allclose(s[0],u[0]) and numpy.allclose(s[1],u[1]) for (s,u) in zip(scaled,unscaled)])
@@ -0,0 +1,83 @@
+# Copyright 2004, Magnus Hagdorn
+#
+# This file is part of PyGMT.
+#
+# PyGMT is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# PyGMT is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyGMT; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import numpy,PyGMT
+from PyGMT.PyGMTproject import Projection
+
+# numpy projections are compared with mapproject, plot coordinates have to
+# agree within 0.001cm and geographic coordinates within 1e-6 degrees
+TOLERANCE = 1e-3
+TOLERANCE_INV = 1e-6
+
+cases = [('B33.5/60.5/52.833332/68.166664/10','7/49/60.182301/71.915405r'),
+         ('L-100/40/30/50/15','-120/-80/25/55'),
+         ('S0/90/15','-30/30/60/85'),
+         ('M10','-30/30/-60/60'),
+         ('X10/5','0/10/0/5'),
+         ('X10l/5','1/1000/0/5')]
+
+def mapproject(args,x,y):
+    out = PyGMT.command('mapproject','%s %s %s'%(args,PyGMT.binary_input(2),PyGMT.binary_output()),
+                        indata=PyGMT.pack_table([x,y]))
+    xy = PyGMT.unpack_table(out,2)
+    return (xy[:,0],xy[:,1])
+
+for (projection,region) in cases:
+    prj = Projection(projection,region)
+    r = [float(v) for v in region.rstrip('r').split('/')]
+    if region.endswith('r'):
+        (w,s,e,n) = r
+    else:
+        (w,e,s,n) = r
+    lon = numpy.linspace(w,e,11).repeat(11)
+    lat = numpy.tile(numpy.linspace(s,n,11),11)
+    args = '-R%s -J%s'%(region,projection)
+
+    (x,y) = prj.forward(lon,lat)
+    (gx,gy) = mapproject(args,lon,lat)
+    err = max(abs(x-gx).max(),abs(y-gy).max())
+
+    (ilon,ilat) = prj.inverse(gx,gy)
+    (glon,glat) = mapproject('-I '+args,gx,gy)
+    ierr = max(abs(ilon-glon).max(),abs(ilat-glat).max())
+
+    print '%-35s forward error %gcm, inverse error %g degrees'%(projection,err,ierr)
+    assert err < TOLERANCE and ierr < TOLERANCE_INV
+
+# mapproject is used by areas when the numpy projections are disabled
+PyGMT.PyGMTproject.enabled = False
+try:
+    PyGMT.get_projection('X10/5','0/10/0/5')
+except NotImplementedError:
+    print 'numpy projections disabled'
+PyGMT.PyGMTproject.enabled = True
+
+# a change of the canvas measure unit after the area is created applies to
+# the numpy projection as well as to mapproject
+plot = PyGMT.Canvas('project.ps')
+area = PyGMT.AreaXY(plot,size=[10.,5.])
+area.setregion([0.,0.],[10.,5.])
+area.projection = 'X10c/5c'
+plot.defaults['MEASURE_UNIT'] = 'inch'
+(x,y) = area.project([1.,5.],[1.,2.])
+PyGMT.PyGMTproject.enabled = False
+(gx,gy) = area.project([1.,5.],[1.,2.])
+PyGMT.PyGMTproject.enabled = True
+print 'inch:', x, y, gx, gy
+assert max(abs(numpy.array(x)-gx).max(),abs(numpy.array(y)-gy).max()) < TOLERANCE/2.54
+plot.close()